@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+Extraction Benchmark
+
+This script reports the number of webpages per second from which each
+extractor backend extracts the article text, together with the full-page
+BeautifulSoup parse that get_article used to perform. The webpages are read
+from the specified directory (files ending in .html or .body, such as the
+pages of the HTTP cache), or else generated. Before timing, the text each
+backend extracts from pages of various encodings, with and without a charset
+declaration, is checked against the text extracted by BeautifulSoup.
+
+Usage (from the API Scraper folder):
+    python bench_extract.py [directory of saved webpages]
+
+"""
+
+# Import the dependencies
+import codecs
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+# Import the config file
+import scraping_config
+
+from extractors import EXTRACTORS
+
+
+#========================================================================
+# This function extracts the text of an article the way get_article used
+# to: by parsing the whole webpage and concatenating the paragraphs one at a
+# time.
+#
+# Input:
+#   webpage - the webpage of the article
+#   element - the tag of the article element
+#   css_class - the CSS class of the article element
+#
+# Return:
+#   the text of the article
+def extract_full_parse(webpage, element, css_class):
+    soup = BeautifulSoup(webpage, 'html.parser')
+    article = soup.findAll(element, {"class": css_class})[0]
+
+    text = ""
+    for p in article.findAll("p"):
+        text = "\n".join([text, p.text])
+
+    return text
+
+
+#========================================================================
+# This function generates a webpage resembling an article page: mostly
+# scripts and navigation, with the article element in the middle.
+#
+# Input:
+#   None
+#
+# Return:
+#   the webpage
+def generated_page():
+    noise = "<script>var x = {};</script><div class='nav'><a href='#'>link</a></div>" * 400
+    paragraphs = "".join("<p>Paragraph {} of the <b>article</b> text.</p>".format(i)
+                         for i in range(60))
+
+    return "<html><head>{0}</head><body>{0}<div class='caas-body'>{1}</div>{0}</body></html>" \
+        .format(noise, paragraphs).encode("utf-8")
+
+
+#========================================================================
+# This function generates article pages of various encodings, with and
+# without a charset declaration.
+#
+# Input:
+#   None
+#
+# Return:
+#   the dictionary of the pages, keyed by description
+def encoding_pages():
+    text = "Café “quoted” — naïve"
+    page = "<html><head>{}</head><body><div class='caas-body'><p>{}</p><p>{}</p></div>" \
+           "</body></html>"
+
+    return {
+        "utf-8, no declaration": page.format("", text, text).encode("utf-8"),
+        "utf-8, meta charset": page.format("<meta charset='utf-8'>", text, text)
+            .encode("utf-8"),
+        "utf-8, byte order mark": codecs.BOM_UTF8 + page.format("", text, text)
+            .encode("utf-8"),
+        "windows-1252, meta charset": page.format(
+            "<meta http-equiv='Content-Type' content='text/html; charset=windows-1252'>",
+            text, text).encode("windows-1252"),
+        "windows-1252, no declaration": page.format("", text, text).encode("windows-1252"),
+    }
+
+
+#========================================================================
+# This function checks that each backend extracts the same text as
+# BeautifulSoup from the pages of various encodings.
+#
+# Input:
+#   backends - the extractor backends, keyed by name
+#   css - the css elements of the article element
+#
+# Return:
+#   the number of mismatches
+def check_parity(backends, css):
+    mismatches = 0
+
+    for description, page in encoding_pages().items():
+        expected = EXTRACTORS["bs4"](page, css["element"], css["class"])
+
+        for name, extractor in backends.items():
+            text = extractor(page, css["element"], css["class"]).strip("\n")
+            if text != expected.strip("\n"):
+                mismatches += 1
+                print("parity mismatch: {} on {}: {!r}".format(name, description, text))
+
+    return mismatches
+
+
+#========================================================================
+# This function reads the saved webpages of the specified directory.
+#
+# Input:
+#   directory - the directory of saved webpages
+#
+# Return:
+#   the list of webpages
+def saved_pages(directory):
+    pages = []
+
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.endswith((".html", ".body")):
+                with open(os.path.join(root, name), "rb") as f:
+                    pages.append(f.read())
+
+    return pages
+
+
+if __name__ == "__main__":
+
+    directory = sys.argv[1] if len(sys.argv) > 1 else scraping_config.http_cache_dir
+
+    pages = saved_pages(directory) if directory and os.path.isdir(directory) else []
+    if not pages:
+        pages = [generated_page()] * 50
+
+    css = scraping_config.article_text["yahoo.com"]["css"]
+    backends = dict(EXTRACTORS, **{"bs4 full parse": extract_full_parse})
+
+    print("parity mismatches: {}".format(check_parity(backends, css)))
+
+    for name, extractor in backends.items():
+        failures = 0
+
+        start = time.perf_counter()
+        for page in pages:
+            try:
+                extractor(page, css["element"], css["class"])
+            except Exception:
+                failures += 1
+        elapsed = time.perf_counter() - start
+
+        print("{:15s} {:8.1f} pages/s  failures: {}".format(
+            name, len(pages) / elapsed, failures))
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Fetch Benchmark
+
+This script starts a local HTTP stand-in that serves the fixtures of the
+data folder with an artificial latency, then reports the throughput of the
+Fetcher at several concurrency levels. No request leaves the machine.
+
+Usage (from the API Scraper folder):
+    python bench_fetch.py [number of requests] [latency in ms]
+
+"""
+
+# Import the dependencies
+import functools
+import sys
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from fetcher import Fetcher
+
+
+# Class SlowHandler
+class SlowHandler(SimpleHTTPRequestHandler):
+
+    # Keep the connections alive between requests
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    # The artificial latency of each response, in seconds
+    latency = 0.05
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+# Class FixtureServer
+class FixtureServer(ThreadingHTTPServer):
+
+    # Accept bursts of concurrent connections without dropping any
+    request_queue_size = 256
+
+
+#========================================================================
+# This function starts the local HTTP stand-in in a background thread.
+#
+# Input:
+#   directory - the directory whose files are served
+#   latency - the artificial latency of each response, in seconds
+#
+# Return:
+#   the server and its base url
+def serve_fixtures(directory="../data", latency=0.05):
+    SlowHandler.latency = latency
+    handler = functools.partial(SlowHandler, directory=directory)
+
+    server = FixtureServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server, "http://127.0.0.1:{}".format(server.server_address[1])
+
+
+if __name__ == "__main__":
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.05
+
+    server, base_url = serve_fixtures(latency=latency)
+    urls = ["{}/{}/url.html".format(base_url, 1 + i % 2) for i in range(count)]
+
+    for concurrency in (1, 4, 16, 64):
+        fetcher = Fetcher(max_workers=concurrency, per_host_limit=concurrency)
+
+        start = time.perf_counter()
+        outcomes = fetcher.fetch_all(urls)
+        elapsed = time.perf_counter() - start
+
+        failures = sum(isinstance(outcome, Exception) for outcome in outcomes)
+        stats = fetcher.pool.stats()
+        print("concurrency: {:3d}  {:8.1f} pages/s  failures: {}  reuse rate: {:.0%}  "
+              "avg connect: {:.2f} ms".format(concurrency, count / elapsed, failures,
+                                              stats["reuse_rate"],
+                                              stats["avg_connect_time"] * 1000))
+        fetcher.pool.close()
+
+    server.shutdown()
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+Routing Benchmark
+
+This script reports the number of article urls per second matched to their
+publication, as the number of configured publications grows, with the
+substring scan over the article_text keys that get_jobs used to perform and
+with the SourceRouter. A quarter of the urls are from publications that are
+not configured.
+
+Usage (from the API Scraper folder):
+    python bench_routing.py [number of publications ...]
+
+"""
+
+# Import the dependencies
+import random
+import sys
+import time
+
+from routing import SourceRouter
+
+
+#========================================================================
+# This function generates the article_text section of the config file for
+# the specified number of publications.
+#
+# Input:
+#   count - the number of publications
+#
+# Return:
+#   the css elements of the publications, keyed by host name
+def make_article_text(count):
+    return {"news{}.example.com".format(i): {"css": {"element": "div", "class": "body"}}
+            for i in range(count)}
+
+
+#========================================================================
+# This function generates article urls.
+#
+# Input:
+#   hosts - the configured host names
+#   count - the number of urls
+#
+# Return:
+#   the list of urls
+def make_urls(hosts, count):
+    random.seed(0)
+
+    return ["https://{}{}/news/article-{}.html".format(
+                random.choice(["", "www.", "finance."]),
+                random.choice(hosts) if i % 4 else "unknown{}.org".format(i % 97), i)
+            for i in range(count)]
+
+
+#========================================================================
+# This function matches the urls with the substring scan get_jobs used to
+# perform.
+#
+# Input:
+#   sources - the configured host names
+#   urls - the article urls
+#
+# Return:
+#   the number of urls matched
+def match_scan(sources, urls):
+    matched = 0
+
+    for url in urls:
+        for source in sources:
+            if source in url:
+                matched += 1
+                break
+
+    return matched
+
+
+#========================================================================
+# This function matches the urls with the SourceRouter.
+#
+# Input:
+#   router - the SourceRouter
+#   urls - the article urls
+#
+# Return:
+#   the number of urls matched
+def match_router(router, urls):
+    return sum(1 for url in urls if router.route(url) is not None)
+
+
+if __name__ == "__main__":
+
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1, 10, 100, 1000]
+
+    for count in sizes:
+        article_text = make_article_text(count)
+        urls = make_urls(list(article_text), 20000)
+
+        start = time.perf_counter()
+        scanned = match_scan(article_text.keys(), urls)
+        scan = time.perf_counter() - start
+
+        router = SourceRouter(article_text)
+
+        start = time.perf_counter()
+        routed = match_router(router, urls)
+        route = time.perf_counter() - start
+
+        print("publications: {:5d}  matched: {:5d} / {:5d}  "
+              "scan: {:10.0f} urls/s  router: {:10.0f} urls/s".format(
+                  count, routed, scanned, len(urls) / scan, len(urls) / route))
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+Snippet Reader Benchmark
+
+This script writes a dump of api responses, one per line, then reports the
+time taken and the peak memory allocated to read the english snippets of
+the dump, the way parse_articles used to (readlines, then json.loads on
+every line) and with the streaming snippet reader.
+
+Usage (from the API Scraper folder):
+    python bench_snippets.py [number of responses] [snippets per response]
+
+"""
+
+# Import the dependencies
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import snippets
+
+
+#========================================================================
+# This function writes a dump of api responses, one per line.
+#
+# Input:
+#   path - the path of the dump
+#   responses - the number of responses
+#   per_response - the number of snippets of each response
+#
+# Return:
+#   None
+def write_dump(path, responses, per_response):
+    with open(path, "w", encoding="utf-8") as file:
+        for i in range(responses):
+            data = [{"author": None,
+                     "title": "Article {} of page {}".format(j, i),
+                     "description": "A description of the article " * 10,
+                     "url": "https://finance.yahoo.com/news/article-{}-{}.html".format(i, j),
+                     "source": "Yahoo | Business Finance",
+                     "language": "en" if j % 4 else "de",
+                     "published_at": "2021-01-01T00:00:00+00:00"}
+                    for j in range(per_response)]
+
+            file.write(json.dumps({"pagination": {"offset": i * per_response,
+                                                  "count": per_response},
+                                   "data": data}))
+            file.write("\n")
+
+
+#========================================================================
+# This function reads the english snippets the way parse_articles used to.
+#
+# Input:
+#   path - the path of the dump
+#
+# Return:
+#   the number of snippets read
+def read_readlines(path):
+    with open(path, encoding="utf-8") as file:
+        lines = file.readlines()
+
+    for line in lines:
+        content = json.loads(line)
+
+    return sum(1 for article in content["data"] if article["language"] == "en")
+
+
+#========================================================================
+# This function reads the english snippets with the streaming reader.
+#
+# Input:
+#   path - the path of the dump
+#
+# Return:
+#   the number of snippets read
+def read_streaming(path):
+    return sum(1 for _ in snippets.filter_snippets(
+        snippets.read_snippets(path, "data"), lang="en"))
+
+
+#========================================================================
+# This function times a reader and measures its peak memory allocation.
+#
+# Input:
+#   reader - the reader
+#   path - the path of the dump
+#
+# Return:
+#   the number of snippets read, the time taken, in seconds, and the peak
+#   memory allocated, in bytes
+def measure(reader, path):
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    count = reader(path)
+
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return count, elapsed, peak
+
+
+if __name__ == "__main__":
+
+    responses = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    per_response = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    path = os.path.join(tempfile.mkdtemp(), "dump.txt")
+    write_dump(path, responses, per_response)
+
+    print("dump: {:.1f} MB, {} responses of {} snippets".format(
+        os.path.getsize(path) / 2**20, responses, per_response))
+    print("ijson: {}, json backend: {}".format(
+        snippets.ijson is not None, snippets.loads.__module__))
+
+    for name, reader in [("readlines", read_readlines), ("streaming", read_streaming)]:
+        count, elapsed, peak = measure(reader, path)
+
+        print("{:10s} snippets: {:8d}  time: {:7.2f} s  peak memory: {:8.1f} MB".format(
+            name, count, elapsed, peak / 2**20))
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+Article Extractors
+
+This module extracts the text of an article from its webpage. The text is
+made of the paragraphs of the first element of the specified tag and CSS
+class, each paragraph preceded by a line feed.
+
+Two backends are available. The lxml backend parses the webpage with the
+libxml2 HTML parser and jumps straight to the article element with a
+precompiled XPath expression. The webpage is decoded with the encoding of
+its byte order mark or of its meta charset declaration, or else as UTF-8
+when it is valid UTF-8, as libxml2 would otherwise read it as Latin-1. The
+bs4 backend parses the webpage with BeautifulSoup, keeping only the article
+elements. The lxml backend is used when it is available, and the bs4
+backend is used as a fallback.
+
+"""
+
+# Import the dependencies
+import codecs
+import functools
+
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.dammit import EncodingDetector
+
+try:
+    import lxml.etree
+    import lxml.html
+except ImportError:
+    lxml = None
+
+
+#========================================================================
+# This function joins the texts of the paragraphs of an article, each of
+# them preceded by a line feed.
+#
+# Input:
+#   paragraphs - the texts of the paragraphs
+#
+# Return:
+#   the text of the article
+def join_paragraphs(paragraphs):
+    return "".join(["\n" + p for p in paragraphs])
+
+
+#========================================================================
+# This function returns the compiled XPath expression that selects the
+# elements of the specified tag and CSS class.
+#
+# Input:
+#   element - the tag of the article element
+#   css_class - the CSS class of the article element
+#
+# Return:
+#   the compiled XPath expression
+@functools.lru_cache(maxsize=None)
+def article_xpath(element, css_class):
+    return lxml.etree.XPath(
+        "//{}[contains(concat(' ', normalize-space(@class), ' '), ' {} ')]".format(
+            element, css_class))
+
+
+#========================================================================
+# This function returns the encoding of a webpage: the encoding of its byte
+# order mark or of its meta charset declaration, or else UTF-8 if the page
+# is valid UTF-8, and Windows-1252 otherwise.
+#
+# Input:
+#   webpage - the bytes of the webpage
+#
+# Return:
+#   the name of the encoding
+def page_encoding(webpage):
+    _, encoding = EncodingDetector.strip_byte_order_mark(webpage)
+
+    if not encoding:
+        encoding = EncodingDetector.find_declared_encoding(webpage, is_html=True)
+
+    if encoding:
+        try:
+            codecs.lookup(encoding)
+            return encoding
+        except LookupError:
+            pass
+
+    try:
+        webpage.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "windows-1252"
+
+
+#========================================================================
+# This function returns the lxml HTML parser of the specified encoding.
+#
+# Input:
+#   encoding - the name of the encoding
+#
+# Return:
+#   the parser
+@functools.lru_cache(maxsize=None)
+def html_parser(encoding):
+    return lxml.html.HTMLParser(encoding=encoding)
+
+
+#========================================================================
+# This function extracts the text of an article with lxml.
+#
+# Input:
+#   webpage - the webpage of the article
+#   element - the tag of the article element
+#   css_class - the CSS class of the article element
+#
+# Return:
+#   the text of the article
+def extract_lxml(webpage, element, css_class):
+    if lxml is None:
+        raise ImportError("lxml is not installed")
+
+    if isinstance(webpage, bytes):
+        document = lxml.html.fromstring(webpage, parser=html_parser(page_encoding(webpage)))
+    else:
+        document = lxml.html.fromstring(webpage)
+
+    elements = article_xpath(element, css_class)(document)
+
+    # Retrieve the first element
+    article = elements[0]
+
+    return join_paragraphs([p.text_content() for p in article.iterdescendants("p")])
+
+
+#========================================================================
+# This function extracts the text of an article with BeautifulSoup.
+#
+# Input:
+#   webpage - the webpage of the article
+#   element - the tag of the article element
+#   css_class - the CSS class of the article element
+#
+# Return:
+#   the text of the article
+def extract_bs4(webpage, element, css_class):
+    soup = BeautifulSoup(webpage, 'html.parser',
+                         parse_only=SoupStrainer(element, {"class": css_class}))
+
+    # Retrieve the first element
+    article = soup.find(element, {"class": css_class})
+    if article is None:
+        raise IndexError("no {} element of class {}".format(element, css_class))
+
+    return join_paragraphs([p.text for p in article.findAll("p")])
+
+
+# The available extractor backends
+EXTRACTORS = {
+    "lxml": extract_lxml,
+    "bs4": extract_bs4,
+}
+
+
+#========================================================================
+# This function extracts the text of an article with the specified backend,
+# falling back to BeautifulSoup if the backend is not available or fails.
+#
+# Input:
+#   webpage - the webpage of the article
+#   element - the tag of the article element
+#   css_class - the CSS class of the article element
+#   backend - the name of the extractor backend
+#
+# Return:
+#   the text of the article
+def extract(webpage, element, css_class, backend="lxml"):
+    if backend != "bs4":
+        try:
+            return EXTRACTORS[backend](webpage, element, css_class)
+        except Exception:
+            pass
+
+    return extract_bs4(webpage, element, css_class)
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+Article Fetcher
+
+This module downloads a list of webpages concurrently. The number of
+downloads in progress is bounded globally, by the size of a thread pool, and
+per host, by a semaphore for each host. Failed downloads are retried with an
+exponential backoff, and the results are returned in the order of the
+requested urls. The downloads go through a shared HTTP connection pool, so
+that connections to the same host are kept alive and reused, and through an
+optional on-disk response cache.
+
+"""
+
+# Import the dependencies
+import http.client
+import socket
+import threading
+import time
+import urllib.error
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+from http_pool import HTTPPool
+
+
+# Class Fetcher
+class Fetcher:
+
+    #========================================================================
+    # Class constructor
+    #
+    # Input:
+    #   max_workers - the maximum number of downloads in progress
+    #   per_host_limit - the maximum number of downloads in progress per host
+    #   timeout - the timeout of each download, in seconds
+    #   retries - the number of times a failed download is retried
+    #   backoff - the delay before the first retry, in seconds, doubled for
+    #             each subsequent retry
+    #   pool - the HTTP connection pool used for the downloads
+    #   cache - the response cache used for the downloads, if any
+    def __init__(self, max_workers=16, per_host_limit=8, timeout=10,
+                 retries=3, backoff=0.5, pool=None, cache=None):
+        self.pool = pool or HTTPPool(timeout=timeout, max_idle_per_host=per_host_limit)
+        self.cache = cache
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+
+        # The semaphores limiting the downloads in progress per host
+        self.host_limits = {}
+        self.host_limits_lock = threading.Lock()
+
+    #========================================================================
+    # This method returns the semaphore limiting the downloads in progress
+    # for the host of the specified url.
+    #
+    # Input:
+    #   url - the url to be downloaded
+    #
+    # Return:
+    #   the semaphore of the host
+    def host_limit(self, url):
+        host = urllib.parse.urlsplit(url).netloc
+
+        with self.host_limits_lock:
+            if host not in self.host_limits:
+                self.host_limits[host] = threading.BoundedSemaphore(self.per_host_limit)
+
+            return self.host_limits[host]
+
+    #========================================================================
+    # This method downloads the specified url once.
+    #
+    # Input:
+    #   url - the url to be downloaded
+    #
+    # Return:
+    #   the body of the response
+    def download(self, url):
+        if self.cache is not None:
+            return self.cache.fetch(url)
+
+        return self.pool.request(url).body
+
+    #========================================================================
+    # This method returns whether a failed download is worth retrying. Client
+    # errors, other than rate limiting, are not retried.
+    #
+    # Input:
+    #   error - the exception raised by the download
+    #
+    # Return:
+    #   True if the download is to be retried
+    def retryable(self, error):
+        if isinstance(error, urllib.error.HTTPError):
+            return error.code == 429 or error.code >= 500
+
+        return isinstance(error, (urllib.error.URLError, socket.timeout,
+                                  ConnectionError, http.client.HTTPException))
+
+    #========================================================================
+    # This method downloads the specified url, within the limit of its host,
+    # retrying the download with an exponential backoff if it fails.
+    #
+    # Input:
+    #   url - the url to be downloaded
+    #
+    # Return:
+    #   the body of the response
+    def fetch(self, url):
+        for attempt in range(self.retries + 1):
+            try:
+                with self.host_limit(url):
+                    return self.download(url)
+
+            except Exception as e:
+                if attempt == self.retries or not self.retryable(e):
+                    raise
+
+            time.sleep(self.backoff * 2 ** attempt)
+
+    #========================================================================
+    # This method returns the outcome of downloading the specified url: the
+    # body of the response, or the exception raised by the download.
+    #
+    # Input:
+    #   url - the url to be downloaded
+    #
+    # Return:
+    #   the body of the response or the exception
+    def fetch_outcome(self, url):
+        try:
+            return self.fetch(url)
+
+        except Exception as e:
+            return e
+
+    #========================================================================
+    # This method downloads the specified urls concurrently.
+    #
+    # Input:
+    #   urls - the list of urls to be downloaded
+    #
+    # Return:
+    #   the list of outcomes (the body of the response, or the exception
+    #   raised by the download), in the order of the urls
+    def fetch_all(self, urls):
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(self.fetch_outcome, urls))
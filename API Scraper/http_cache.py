@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+"""
+HTTP Response Cache
+
+This module keeps the bodies of downloaded webpages on disk, keyed by the
+SHA-256 hash of their url, together with their ETag and Last-Modified
+validators. A cached page younger than the time-to-live is served without a
+request. An older one is revalidated with a conditional GET, and served
+from the cache if the server answers 304 Not Modified. When the cache grows
+beyond its maximum size, the least recently used pages are evicted.
+
+In offline mode, the cached pages are served whatever their age and no
+request is ever sent, which allows a crawl to be replayed.
+
+"""
+
+# Import the dependencies
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+# Class HTTPCache
+class HTTPCache:
+
+    #========================================================================
+    # Class constructor
+    #
+    # Input:
+    #   pool - the HTTP connection pool used for the requests
+    #   directory - the directory in which the pages are cached
+    #   ttl - the time, in seconds, during which a cached page is served
+    #         without being revalidated
+    #   max_bytes - the maximum size of the cached pages, in bytes
+    #   offline - whether the cached pages are served without any request
+    def __init__(self, pool, directory, ttl=86400, max_bytes=512 * 2**20,
+                 offline=False):
+        self.pool = pool
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+
+        self.lock = threading.Lock()
+
+        # Cache statistics
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self.size = sum(size for _, size, _ in self.entries())
+
+    #========================================================================
+    # This method returns the paths of the body and metadata files of the
+    # cached page of the specified url.
+    #
+    # Input:
+    #   url - the url of the page
+    #
+    # Return:
+    #   the paths of the body and the metadata files
+    def paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.directory, key[:2], key)
+
+        return base + ".body", base + ".json"
+
+    #========================================================================
+    # This method lists the cached pages.
+    #
+    # Input:
+    #   None
+    #
+    # Return:
+    #   a generator of (body path, size, last access time) tuples
+    def entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".body"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    yield path, stat.st_size, stat.st_mtime
+
+    #========================================================================
+    # This method atomically writes the specified data to a file.
+    #
+    # Input:
+    #   path - the path of the file
+    #   data - the bytes to be written
+    #
+    # Return:
+    #   None
+    def write(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+
+        os.replace(tmp, path)
+
+    #========================================================================
+    # This method returns the cached page of the specified url.
+    #
+    # Input:
+    #   url - the url of the page
+    #
+    # Return:
+    #   the metadata and body of the cached page, or (None, None)
+    def load(self, url):
+        body_path, meta_path = self.paths(url)
+
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                body = f.read()
+
+        except (FileNotFoundError, ValueError):
+            return None, None
+
+        # Mark the page as recently used
+        os.utime(body_path)
+
+        return meta, body
+
+    #========================================================================
+    # This method stores a page in the cache, then evicts the least recently
+    # used pages if the cache has grown beyond its maximum size.
+    #
+    # Input:
+    #   url - the url of the page
+    #   meta - the metadata of the page
+    #   body - the body of the page, or None to only update the metadata
+    #
+    # Return:
+    #   None
+    def store(self, url, meta, body=None):
+        body_path, meta_path = self.paths(url)
+
+        if body is not None:
+            try:
+                previous = os.path.getsize(body_path)
+            except FileNotFoundError:
+                previous = 0
+
+            self.write(body_path, body)
+
+            with self.lock:
+                self.size += len(body) - previous
+
+        self.write(meta_path, json.dumps(meta).encode("utf-8"))
+
+        if self.size > self.max_bytes:
+            self.evict()
+
+    #========================================================================
+    # This method evicts the least recently used pages until the cache is
+    # back under 90% of its maximum size.
+    #
+    # Input:
+    #   None
+    #
+    # Return:
+    #   None
+    def evict(self):
+        with self.lock:
+            entries = sorted(self.entries(), key=lambda entry: entry[2])
+            target = self.max_bytes * 0.9
+
+            for body_path, size, _ in entries:
+                if self.size <= target:
+                    break
+
+                for path in (body_path, body_path[:-len(".body")] + ".json"):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+
+                self.size -= size
+
+    #========================================================================
+    # This method returns the body of the page of the specified url, from
+    # the cache if it is fresh or still valid, or else from the server.
+    #
+    # Input:
+    #   url - the url of the page
+    #
+    # Return:
+    #   the body of the page
+    def fetch(self, url):
+        meta, body = self.load(url)
+
+        if meta is not None and (self.offline or time.time() - meta["stored_at"] < self.ttl):
+            with self.lock:
+                self.hits += 1
+            return body
+
+        if self.offline:
+            raise LookupError("{} is not in the offline cache".format(url))
+
+        # Revalidate the cached page with a conditional GET
+        headers = {}
+        if meta is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        res = self.pool.request(url, headers=headers)
+
+        if res.status == 304 and meta is not None:
+            meta["stored_at"] = time.time()
+            self.store(url, meta)
+
+            with self.lock:
+                self.revalidated += 1
+            return body
+
+        self.store(url, {
+            "url": url,
+            "stored_at": time.time(),
+            "etag": res.headers.get("ETag"),
+            "last_modified": res.headers.get("Last-Modified"),
+        }, res.body)
+
+        with self.lock:
+            self.misses += 1
+        return res.body
+
+    #========================================================================
+    # This method returns the statistics of the cache.
+    #
+    # Input:
+    #   None
+    #
+    # Return:
+    #   the dictionary of statistics
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.revalidated + self.misses
+
+            return {
+                "hits": self.hits,
+                "revalidated": self.revalidated,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.revalidated) / lookups if lookups else 0.0,
+                "size": self.size,
+            }
@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""
+HTTP Connection Pool
+
+This module provides an HTTP client that keeps its connections alive and
+reuses them for subsequent requests to the same host, instead of opening a
+new TCP/TLS connection for every request. Compressed responses (gzip,
+deflate and, when the brotli library is installed, brotli) are decoded
+transparently. The pool records how often connections are reused and how
+long it takes to open new ones.
+
+"""
+
+# Import the dependencies
+import gzip
+import http.client
+import threading
+import time
+import urllib.error
+import urllib.parse
+import zlib
+from collections import namedtuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# The response to a request: status code, headers and decoded body
+Response = namedtuple("Response", ["status", "headers", "body", "url"])
+
+# The status codes of the redirections that are followed
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+
+# The errors raised when the server has closed an idle keep-alive connection
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError,
+                           BrokenPipeError)
+
+
+# Class HTTPPool
+class HTTPPool:
+
+    #========================================================================
+    # Class constructor
+    #
+    # Input:
+    #   timeout - the timeout of the connections, in seconds
+    #   max_idle_per_host - the maximum number of idle connections kept alive
+    #                       for each host
+    #   user_agent - the User-Agent header sent with every request
+    #   max_redirects - the maximum number of redirections followed
+    def __init__(self, timeout=10, max_idle_per_host=8,
+                 user_agent='Mozilla/5.0', max_redirects=5):
+        self.timeout = timeout
+        self.max_idle_per_host = max_idle_per_host
+        self.user_agent = user_agent
+        self.max_redirects = max_redirects
+
+        # The idle connections, keyed by (scheme, host, port)
+        self.idle = {}
+        self.lock = threading.Lock()
+
+        # Pool statistics
+        self.requests = 0
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self.connect_time = 0.0
+
+        encodings = ["gzip", "deflate"]
+        if brotli is not None:
+            encodings.append("br")
+        self.accept_encoding = ", ".join(encodings)
+
+    #========================================================================
+    # This method returns a connection to the specified host: an idle
+    # connection of the pool if there is one, or else a new connection.
+    #
+    # Input:
+    #   key - the (scheme, host, port) of the connection
+    #
+    # Return:
+    #   the connection and whether it was reused
+    def acquire(self, key):
+        with self.lock:
+            idle = self.idle.get(key)
+            if idle:
+                self.connections_reused += 1
+                return idle.pop(), True
+
+        scheme, host, port = key
+        if scheme == "https":
+            conn = http.client.HTTPSConnection(host, port, timeout=self.timeout)
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+        start = time.perf_counter()
+        conn.connect()
+        elapsed = time.perf_counter() - start
+
+        with self.lock:
+            self.connections_opened += 1
+            self.connect_time += elapsed
+
+        return conn, False
+
+    #========================================================================
+    # This method returns a connection to the pool, or closes it if the pool
+    # already holds enough idle connections for its host.
+    #
+    # Input:
+    #   key - the (scheme, host, port) of the connection
+    #   conn - the connection
+    #
+    # Return:
+    #   None
+    def release(self, key, conn):
+        with self.lock:
+            idle = self.idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+
+        conn.close()
+
+    #========================================================================
+    # This method decodes the body of a response according to its
+    # Content-Encoding header.
+    #
+    # Input:
+    #   body - the body of the response
+    #   encoding - the value of the Content-Encoding header
+    #
+    # Return:
+    #   the decoded body
+    def decode(self, body, encoding):
+        encoding = (encoding or "identity").strip().lower()
+
+        if encoding in ("gzip", "x-gzip"):
+            return gzip.decompress(body)
+
+        if encoding == "deflate":
+            try:
+                return zlib.decompress(body)
+            except zlib.error:
+                # Some servers send a raw deflate stream without zlib header
+                return zlib.decompress(body, -zlib.MAX_WBITS)
+
+        if encoding == "br" and brotli is not None:
+            return brotli.decompress(body)
+
+        return body
+
+    #========================================================================
+    # This method sends a single request, without following redirections.
+    # A reused connection that turns out to have been closed by the server
+    # is replaced by a new one and the request is sent again.
+    #
+    # Input:
+    #   method - the HTTP method
+    #   url - the url of the request
+    #   headers - the additional request headers
+    #
+    # Return:
+    #   the response
+    def send(self, method, url, headers):
+        parts = urllib.parse.urlsplit(url)
+        key = (parts.scheme, parts.hostname,
+               parts.port or (443 if parts.scheme == "https" else 80))
+
+        path = parts.path or "/"
+        if parts.query:
+            path = "?".join([path, parts.query])
+
+        request_headers = {
+            "Host": parts.netloc,
+            "User-Agent": self.user_agent,
+            "Accept-Encoding": self.accept_encoding,
+            "Connection": "keep-alive",
+        }
+        request_headers.update(headers or {})
+
+        while True:
+            conn, reused = self.acquire(key)
+
+            try:
+                conn.request(method, path, headers=request_headers)
+                res = conn.getresponse()
+                body = res.read()
+
+            except STALE_CONNECTION_ERRORS:
+                conn.close()
+                if reused:
+                    continue
+                raise
+
+            except Exception:
+                conn.close()
+                raise
+
+            break
+
+        if res.will_close:
+            conn.close()
+        else:
+            self.release(key, conn)
+
+        with self.lock:
+            self.requests += 1
+
+        body = self.decode(body, res.getheader("Content-Encoding"))
+        return Response(res.status, res.headers, body, url)
+
+    #========================================================================
+    # This method sends a request, following redirections. Responses with an
+    # error status raise an urllib.error.HTTPError, as urlopen does.
+    #
+    # Input:
+    #   url - the url of the request
+    #   headers - the additional request headers
+    #   method - the HTTP method
+    #
+    # Return:
+    #   the response
+    def request(self, url, headers=None, method="GET"):
+        for _ in range(self.max_redirects + 1):
+            res = self.send(method, url, headers)
+
+            if res.status not in REDIRECT_CODES or "Location" not in res.headers:
+                break
+
+            url = urllib.parse.urljoin(url, res.headers["Location"])
+
+        if res.status >= 400:
+            raise urllib.error.HTTPError(url, res.status, http.client.responses.get(
+                res.status, ""), res.headers, None)
+
+        return res
+
+    #========================================================================
+    # This method returns the statistics of the pool.
+    #
+    # Input:
+    #   None
+    #
+    # Return:
+    #   the dictionary of statistics
+    def stats(self):
+        with self.lock:
+            connections = self.connections_opened + self.connections_reused
+
+            return {
+                "requests": self.requests,
+                "connections_opened": self.connections_opened,
+                "connections_reused": self.connections_reused,
+                "reuse_rate": self.connections_reused / connections if connections else 0.0,
+                "connect_time": self.connect_time,
+                "avg_connect_time": (self.connect_time / self.connections_opened
+                                     if self.connections_opened else 0.0),
+            }
+
+    #========================================================================
+    # This method closes all the idle connections of the pool.
+    #
+    # Input:
+    #   None
+    #
+    # Return:
+    #   None
+    def close(self):
+        with self.lock:
+            idle, self.idle = self.idle, {}
+
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+"""
+Scraping Pipeline
+
+This module retrieves, parses and saves articles in three concurrent
+stages connected by bounded queues: fetcher threads download the webpages,
+parser threads extract the article texts, and a single writer thread
+inserts the articles into the database, committing every few articles. A
+full queue blocks the stage that feeds it, so that a slow stage holds back
+the stages before it instead of letting work pile up in memory. Since the
+articles are committed as they go, a crash late in a run only loses the
+articles of the last uncommitted batch.
+
+"""
+
+# Import the dependencies
+import queue
+import threading
+import time
+
+
+# The marker telling a stage that there is no more work
+DONE = object()
+
+
+# Class Stage
+class Stage:
+
+    #========================================================================
+    # Class constructor
+    #
+    # Input:
+    #   name - the name of the stage
+    def __init__(self, name):
+        self.name = name
+
+        self.lock = threading.Lock()
+
+        # Stage statistics
+        self.processed = 0
+        self.errors = 0
+        self.busy_time = 0.0
+        self.start_time = None
+        self.end_time = None
+
+    #========================================================================
+    # This method records the processing of items by the stage.
+    #
+    # Input:
+    #   elapsed - the time spent processing the items, in seconds
+    #   count - the number of items
+    #   error - whether the processing failed
+    #
+    # Return:
+    #   None
+    def record(self, elapsed, count=1, error=False):
+        with self.lock:
+            if error:
+                self.errors += count
+            else:
+                self.processed += count
+            self.busy_time += elapsed
+
+    #========================================================================
+    # This method returns the statistics of the stage.
+    #
+    # Input:
+    #   None
+    #
+    # Return:
+    #   the dictionary of statistics
+    def stats(self):
+        with self.lock:
+            elapsed = ((self.end_time or time.perf_counter()) - self.start_time
+                       if self.start_time else 0.0)
+
+            return {
+                "stage": self.name,
+                "processed": self.processed,
+                "errors": self.errors,
+                "busy_time": self.busy_time,
+                "elapsed": elapsed,
+                "throughput": self.processed / elapsed if elapsed else 0.0,
+            }
+
+
+# Class ScrapePipeline
+class ScrapePipeline:
+
+    #========================================================================
+    # Class constructor
+    #
+    # Input:
+    #   scraper - the Scraper whose fetcher, extraction and database methods
+    #             are used by the stages
+    #   fetch_workers - the number of fetcher threads
+    #   parse_workers - the number of parser threads
+    #   queue_size - the capacity of each queue between two stages
+    #   commit_every - the number of articles inserted per transaction
+    def __init__(self, scraper, fetch_workers=16, parse_workers=2,
+                 queue_size=64, commit_every=20):
+        self.scraper = scraper
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers
+        self.commit_every = commit_every
+
+        self.fetch_queue = queue.Queue(queue_size)
+        self.parse_queue = queue.Queue(queue_size)
+        self.write_queue = queue.Queue(queue_size)
+
+        self.fetch_stage = Stage("fetch")
+        self.parse_stage = Stage("parse")
+        self.write_stage = Stage("write")
+        self.stages = [self.fetch_stage, self.parse_stage, self.write_stage]
+
+    #========================================================================
+    # This method runs a stage worker: it takes the items of its input queue,
+    # processes them and puts the results in its output queue, until it is
+    # told that there is no more work.
+    #
+    # Input:
+    #   stage - the stage of the worker
+    #   process - the function processing an item
+    #   inbox - the input queue
+    #   outbox - the output queue
+    #
+    # Return:
+    #   None
+    def work(self, stage, process, inbox, outbox):
+        while True:
+            item = inbox.get()
+            if item is DONE:
+                return
+
+            url = item[0][1]
+            start = time.perf_counter()
+
+            try:
+                result = process(item)
+
+            except Exception as e:
+                stage.record(time.perf_counter() - start, error=True)
+                self.scraper.logger.error("Cound not retrieve article from {}.\n Error = {}".
+                                          format(url, e))
+                continue
+
+            stage.record(time.perf_counter() - start)
+            outbox.put(result)
+
+    #========================================================================
+    # This method downloads the webpage of an article.
+    #
+    # Input:
+    #   item - the ((title, url, source),) item of the article
+    #
+    # Return:
+    #   the ((title, url, source), webpage) item of the article
+    def fetch(self, item):
+        job = item[0]
+
+        with self.scraper.metrics.stage("fetch"):
+            webpage = self.scraper.fetcher.fetch(job[1])
+
+        self.scraper.count_webpages([webpage])
+
+        return job, webpage
+
+    #========================================================================
+    # This method extracts the text of an article from its webpage.
+    #
+    # Input:
+    #   item - the ((title, url, source), webpage) item of the article
+    #
+    # Return:
+    #   the ((title, url, source), row) item of the article
+    def parse(self, item):
+        (title, url, source), webpage = item
+        return item[0], self.scraper.build_article(title, url, source, webpage)
+
+    #========================================================================
+    # This method runs the writer: it inserts the parsed articles into the
+    # database, committing every commit_every articles.
+    #
+    # Input:
+    #   None
+    #
+    # Return:
+    #   None
+    def write(self):
+        try:
+            conn = self.scraper.get_db_connection()
+            self.scraper.ensure_schema(conn)
+
+        except Exception as e:
+            # Keep draining the queue so that the other stages do not block
+            conn = None
+            self.scraper.logger.fatal(f"Error connecting to database: {e}")
+
+        batch = []
+        done = False
+
+        while not done:
+            item = self.write_queue.get()
+
+            if item is DONE:
+                done = True
+            else:
+                batch.append(item[1])
+
+            if batch and (done or len(batch) >= self.commit_every):
+                start = time.perf_counter()
+
+                try:
+                    if conn is None:
+                        raise RuntimeError("no database connection")
+
+                    self.scraper.insert_articles(conn, batch)
+                    self.write_stage.record(time.perf_counter() - start, len(batch))
+
+                except Exception as e:
+                    self.write_stage.record(time.perf_counter() - start, len(batch),
+                                            error=True)
+                    self.scraper.logger.fatal(f"Error saving articles to database: {e}")
+
+                batch = []
+
+        if conn is not None:
+            conn.close()
+
+    #========================================================================
+    # This method starts the specified number of threads running a function.
+    #
+    # Input:
+    #   count - the number of threads
+    #   target - the function run by the threads
+    #   args - the arguments of the function
+    #
+    # Return:
+    #   the list of started threads
+    def start_threads(self, count, target, *args):
+        threads = [threading.Thread(target=target, args=args, daemon=True)
+                   for _ in range(count)]
+
+        for thread in threads:
+            thread.start()
+
+        return threads
+
+    #========================================================================
+    # This method stops the threads of a stage once its input queue has been
+    # drained, and records the end time of the stage.
+    #
+    # Input:
+    #   stage - the stage
+    #   threads - the threads of the stage
+    #   inbox - the input queue of the stage
+    #
+    # Return:
+    #   None
+    def stop(self, stage, threads, inbox):
+        for _ in threads:
+            inbox.put(DONE)
+
+        for thread in threads:
+            thread.join()
+
+        stage.end_time = time.perf_counter()
+
+    #========================================================================
+    # This method runs the pipeline over the specified articles.
+    #
+    # Input:
+    #   jobs - the iterable of (title, url, source) of the articles
+    #
+    # Return:
+    #   whether all the parsed articles were inserted into the database
+    def run(self, jobs):
+        start = time.perf_counter()
+        for stage in self.stages:
+            stage.start_time = start
+
+        fetchers = self.start_threads(self.fetch_workers, self.work, self.fetch_stage,
+                                      self.fetch, self.fetch_queue, self.parse_queue)
+        parsers = self.start_threads(self.parse_workers, self.work, self.parse_stage,
+                                     self.parse, self.parse_queue, self.write_queue)
+        writers = self.start_threads(1, self.write)
+
+        # Feed the articles to the fetchers, blocking while the queue is full
+        for job in jobs:
+            self.fetch_queue.put((job,))
+
+        # Drain the stages in order
+        self.stop(self.fetch_stage, fetchers, self.fetch_queue)
+        self.stop(self.parse_stage, parsers, self.parse_queue)
+        self.stop(self.write_stage, writers, self.write_queue)
+
+        return self.write_stage.errors == 0
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Source Router
+
+This module matches the urls of the articles to the extraction rules of the
+supported publications. The rules are compiled once from the article_text
+section of the config file, keyed by host name. The host of a url is parsed
+with a precompiled expression, then looked up in a dictionary of the rules,
+from the full host name down to its parent domains, so that
+finance.yahoo.com is matched by the yahoo.com rule. The cost of a lookup
+depends on the number of labels of the host, not on the number of
+publications.
+
+"""
+
+# Import the dependencies
+import functools
+import re
+from collections import namedtuple
+
+
+# The extraction rule of a publication: the article_text key of the
+# publication, and the tag and CSS class of its article element
+Rule = namedtuple("Rule", ["name", "element", "css_class"])
+
+# The host of an absolute url, past the scheme and the user information
+HOST = re.compile(r"[A-Za-z][A-Za-z0-9+.-]*://(?:[^/?#@]*@)?([^/?#:]+)")
+
+
+# Class SourceRouter
+class SourceRouter:
+
+    #========================================================================
+    # Class constructor
+    #
+    # Input:
+    #   article_text - the css elements of the publications, keyed by host
+    #                  name, as in the config file
+    #   cache_size - the number of hosts whose rule is remembered
+    def __init__(self, article_text, cache_size=4096):
+
+        # The rules, keyed by lower-case host name
+        self.rules = {}
+
+        for name, settings in article_text.items():
+            host = name.lower().strip(".")
+            if host.startswith("www."):
+                host = host[4:]
+
+            self.rules[host] = Rule(name, settings["css"]["element"],
+                                    settings["css"]["class"])
+
+        # The rules of the publications, keyed by article_text key
+        self.by_name = {rule.name: rule for rule in self.rules.values()}
+
+        self.match_host = functools.lru_cache(maxsize=cache_size)(self.lookup_host)
+
+    #========================================================================
+    # This method looks up the rule of a host, from the full host name down
+    # to its parent domains.
+    #
+    # Input:
+    #   host - the lower-case host name
+    #
+    # Return:
+    #   the rule of the host, or None if the host is not supported
+    def lookup_host(self, host):
+        rules = self.rules
+
+        while host:
+            rule = rules.get(host)
+            if rule is not None:
+                return rule
+
+            host = host.partition(".")[2]
+
+        return None
+
+    #========================================================================
+    # This method returns the rule of the publication of a url.
+    #
+    # Input:
+    #   url - the url of the article
+    #
+    # Return:
+    #   the rule of the publication, or None if it is not supported
+    def route(self, url):
+        if not isinstance(url, str):
+            return None
+
+        match = HOST.match(url)
+        if match is None:
+            return None
+
+        return self.match_host(match.group(1).lower())
+
+    #========================================================================
+    # This method returns the rule of a publication.
+    #
+    # Input:
+    #   name - the article_text key of the publication
+    #
+    # Return:
+    #   the rule of the publication
+    def rule(self, name):
+        return self.by_name[name]
@@ -10,16 +10,45 @@ text contents which it stores in a relational database for further processing.
 """
 
 # Import the dependencies
-import http.client, urllib.parse, urllib.request
-import json
-from bs4 import BeautifulSoup
-from urllib.request import Request, urlopen
+import hashlib
+import itertools
+from datetime import datetime
+import urllib.parse
 import sqlite3
 import logging
+import threading
 
 # Import the config file
 import scraping_config
 
+# Import the stage timers and counters
+from instrumentation import Metrics, profiled
+
+# Import the HTTP connection pool, the response cache and the concurrent
+# article fetcher
+from http_pool import HTTPPool
+from http_cache import HTTPCache
+from fetcher import Fetcher
+
+# Import the article text extractors
+from extractors import extract
+
+# Import the scraping pipeline
+from pipeline import ScrapePipeline
+
+# Import the streaming snippet reader
+from snippets import read_snippets, filter_snippets, resolve_path, get_path, batched, loads
+
+# Import the router matching the article urls to their publications
+from routing import SourceRouter
+
+
+# The query parameters that only track the origin of a visit, and do not
+# identify the article
+TRACKING_PARAMS = {"fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid",
+                   "mc_cid", "mc_eid", "_ga", "guccounter", "guce_referrer",
+                   "guce_referrer_sig"}
+
 
 # Class Scraper 
 class Scraper:
@@ -29,7 +58,7 @@ class Scraper:
     def __init__(self):
         # Initialize logging
         self.logger = logging.getLogger(scraping_config.log_file)
-        self.logger.setLevel(logging.DEBUG)
+        self.logger.setLevel(scraping_config.log_level)
         
         # create file handler which logs even debug messages
         fh = logging.FileHandler(scraping_config.log_file)
@@ -41,12 +70,54 @@ class Scraper:
         
         # add the handlers to logger
         self.logger.addHandler(fh)
+        
+        # Initialize the stage timers and counters of the run
+        self.metrics = Metrics("scraper")
+        
+        # Initialize the HTTP connection pool shared by the api calls and 
+        # the article downloads
+        self.http = HTTPPool(timeout=scraping_config.fetch_timeout,
+                             max_idle_per_host=scraping_config.http_pool_max_idle_per_host)
+        
+        # Initialize the on-disk cache of the article webpages
+        self.cache = None
+        if scraping_config.http_cache_dir:
+            self.cache = HTTPCache(self.http, scraping_config.http_cache_dir,
+                                   ttl=scraping_config.http_cache_ttl,
+                                   max_bytes=scraping_config.http_cache_max_bytes,
+                                   offline=scraping_config.http_cache_offline)
+        
+        # Initialize the concurrent article fetcher
+        self.fetcher = Fetcher(max_workers=scraping_config.fetch_max_workers,
+                               per_host_limit=scraping_config.fetch_per_host_limit,
+                               timeout=scraping_config.fetch_timeout,
+                               retries=scraping_config.fetch_retries,
+                               backoff=scraping_config.fetch_backoff,
+                               pool=self.http,
+                               cache=self.cache)
+        
+        # Compile the extraction rules of the supported publications
+        self.router = SourceRouter(scraping_config.article_text)
+        
+        # The paths of the title and url fields of the snippets, resolved
+        # once per api
+        self.field_paths = {}
+        
+        # The published_at high-water marks reached by the api calls of this
+        # run, saved once their articles have been stored
+        self.cursors = {}
+        
+        # The schema is checked once, by the first of the threads needing it
+        self.schema_lock = threading.Lock()
+        self.schema_ready = False
     
         
     #========================================================================
     # This method retrieves tha articles from the apis that are identified
     # in the scraping_config configuration file. It stores the articles in
-    # a text file also identified in the config file.
+    # a text file also identified in the config file. The scraper itself no
+    # longer reads the text file, but streams the api pages straight into
+    # parsing; the file is kept as a sample of the api responses.
     #
     # Input:
     #   None
@@ -62,19 +133,117 @@ class Scraper:
         for api in apis:
             
             # Issue the api call ...
-            conn = http.client.HTTPConnection(api["url"])
             params = urllib.parse.urlencode(api["params"])
-            conn.request('GET', api["uri"].format(params))
+            url = "".join([api.get("scheme", "http"), "://", api["url"],
+                           api["uri"].format(params)])
             
             # Retrieve the response ...
-            res = conn.getresponse()
-            data = res.read()
+            data = self.http.request(url).body
         
             # Save the response to the text file specified in the config file ...
             file = open(api["file"],"w")
             file.write(data.decode(api["encoding"]))
             file.close()
                 
+    #========================================================================
+    # This method returns the publication time of an article snippet.
+    #
+    # Input:
+    #   snippet - the article snippet
+    #   field - the snippet field holding the publication time
+    #
+    # Return:
+    #   the publication time, or None if the snippet has none
+    def published_at(self,snippet,field):
+        value = snippet.get(field)
+        if not value:
+            return None
+        
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    
+    #========================================================================
+    # This method retrieves the article snippets of an api page by page, 
+    # newest first, paging with the offset parameter. It stops at the first
+    # snippet published before the high-water mark of the previous runs, at
+    # the last page, or after the maximum number of pages of the api. The 
+    # new high-water mark is only recorded once all the pages have been
+    # retrieved, so that a failed page is retrieved again by the next run.
+    # When the maximum number of pages is reached first, the snippets left
+    # between the old high-water mark and the last page are skipped, and
+    # logged, so that the next runs stay incremental.
+    #
+    # Input:
+    #   api - the api whose snippets are to be retrieved
+    #
+    # Return:
+    #   a generator of the lists of snippets of each page
+    def iter_snippets(self,api):
+        
+        field = api.get("cursor-field", "published_at")
+        limit = api["params"].get("limit", 100)
+        
+        cursor = self.get_cursor(api["name"])
+        since = datetime.fromisoformat(cursor) if cursor else None
+        newest = oldest = None
+        
+        for page in range(api.get("max-pages", 1)):
+            
+            # Issue the api call for the page ...
+            params = urllib.parse.urlencode(dict(api["params"], offset=page * limit))
+            url = "".join([api.get("scheme", "http"), "://", api["url"],
+                           api["uri"].format(params)])
+            
+            try:
+                with self.metrics.stage("api"):
+                    body = self.http.request(url).body
+                    payload = loads(body.decode(api["encoding"]))
+                    snippets = payload[api["article-list"]]
+                
+                self.metrics.count("api_bytes", len(body))
+                self.metrics.count("snippets", len(snippets))
+            
+            except Exception as e:
+                self.logger.error("Could not retrieve page {} of {}.\n Error = {}".
+                                  format(page, api["name"], e))
+                return
+            
+            # Keep the snippets published since the high-water mark
+            fresh = []
+            for snippet in snippets:
+                published = self.published_at(snippet, field)
+                
+                if since is not None and published is not None and published < since:
+                    break
+                
+                fresh.append(snippet)
+                if published is not None:
+                    if newest is None or published > newest:
+                        newest = published
+                    if oldest is None or published < oldest:
+                        oldest = published
+            
+            self.logger.debug("API %s page %d: %d new snippets", api["name"], page, len(fresh))
+            
+            yield fresh
+            
+            # Stop at the high-water mark or at the last page
+            total = payload.get("pagination", {}).get("total")
+            if (len(fresh) < len(snippets) or len(snippets) < limit
+                    or (total is not None and (page + 1) * limit >= total)):
+                break
+        
+        else:
+            self.logger.warning("API %s has more new snippets than its %d pages: "
+                                "skipping those published before %s%s",
+                                api["name"], api.get("max-pages", 1), oldest,
+                                " and after " + cursor if cursor else "")
+        
+        if newest is not None:
+            self.cursors[api["name"]] = newest.isoformat()
+    
     #========================================================================
     # This method filters out the articles from the retrieved 
     # article snippets that are not in the specified language, lang.
@@ -87,81 +256,180 @@ class Scraper:
     #   ls - filtered list of article snippers
     
     def language(self,ls,lang=''):
-        for i,article in enumerate(ls):
-            if article['language'] != lang:
-               ls.pop(i)
+        return [snippet for snippet, _, _ in filter_snippets(ls, lang=lang)]
+    
+    #========================================================================
+    # This method returns the pages of article snippets of an api: the pages
+    # of the api calls, or, when the config file says so, the snippets of
+    # the api text file, read as a stream and grouped into pages.
+    #
+    # Input:
+    #   api - the api whose snippets are to be retrieved
+    #
+    # Return:
+    #   a generator of the lists of snippets of each page
+    def snippet_pages(self,api):
+        
+        if not scraping_config.api_from_file:
+            return self.iter_snippets(api)
+        
+        snippets = read_snippets(api["file"], api["article-list"], api["encoding"])
         
-        return ls
+        return batched(snippets, api["params"].get("limit", 100))
         
     #========================================================================
     # This method retrieves the article from the specified url. 
     # 
     # Input:
     #   url - The url of the article to be retrieved
+    #   source - The publication of the article
     #
     # Return:
     #   text - the text of the article
     def get_article(self,url=None,source=None):
         
-        # Create the request object to retrieve the article
-        req = Request(url, headers={'User-Agent': 'Mozilla/5.0'})
-        
         # Retrieve the article webpage
-        webpage = urlopen(req).read()
+        webpage = self.fetcher.fetch(url)
         
-        # Create a BeautifulSoup object to parse the webpage
-        soup = BeautifulSoup(webpage, 'html.parser')
+        # Extract the text of the article from the webpage
+        return self.extract_text(webpage,source)
         
-        # Locate the article element
-        # mydivs = soup.findAll("div", {"class": "caas-body"})
-        article_element = scraping_config.article_text[source]["css"]["element"]
-        article_class = scraping_config.article_text[source]["css"]["class"]
-        elements = soup.findAll(article_element, {"class": article_class})
+    #========================================================================
+    # This method extracts the text of the article from its webpage. 
+    # 
+    # Input:
+    #   webpage - The webpage of the article
+    #   source - The publication of the article
+    #
+    # Return:
+    #   text - the text of the article
+    def extract_text(self,webpage,source):
         
-        # Retrieve the first element
-        article = elements[0]
-            
-        # Get all the paragraph elements
-        ps = article.findAll("p")
+        # Locate the article element
+        rule = self.router.rule(source)
         
-        # Iterate through all the paragraph elements and append then to the 
-        # text of the article. 
-        text = ""
-        for p in ps:
-            text = "\n".join([text,p.text])
+        # Extract the paragraphs of the article element with the backend 
+        # specified in the config file
+        text = extract(webpage, rule.element, rule.css_class,
+                       backend=scraping_config.extractor_backend)
         
         # Return the text of the article
         return text
         
     #========================================================================
-    # This method returns the specified JSON element of the article in question. 
-    # It recursively traverses the JSON structure until it finds the sought 
-    # JSON item.
+    # This method returns the paths of the title and url fields of the 
+    # snippets of an api, as configured by its 'article-title' and 
+    # 'article-url' keys. The paths are resolved from the first snippet of
+    # the api, then reused for all its snippets.
     #
     # Input:
-    #   article - the article snippet from which the JSON element is sought
-    #   element - the JSON element that is sought
+    #   api - the api of the snippets
+    #   snippet - a snippet of the api
     #
     # Return:
-    #   the sought element
-    def get_element(self,article,element):
-        # Retrieve the keys from article
-        keys = article.keys()
+    #   the (title path, url path) tuple
+    def get_field_paths(self,api,snippet):
         
-        # If the sought element is found ...
-        if element in keys:
+        paths = self.field_paths.get(api["name"])
+        
+        if paths is None:
+            fields = (api.get("article-title", "title"), api.get("article-url", "url"))
+            paths = tuple(resolve_path(snippet, field) or tuple(field.split("."))
+                          for field in fields)
             
-            # Return the element
-            return article[element]
-        else:
+            self.field_paths[api["name"]] = paths
+            self.logger.debug("API %s fields: title %s, url %s", api["name"], *paths)
+        
+        return paths
+    
+    #========================================================================
+    # This method retrieves the article snippets of an api, page by page, 
+    # filters them to only those in a specific language and from a 
+    # supported publication, and skips the articles that are already stored 
+    # in the database. The articles of each page are yielded as soon as the
+    # page is retrieved or read.
+    #
+    # Input:
+    #   api - the api whose snippets are to be retrieved
+    #
+    # Return:
+    #   a generator of the (title, url, source) of the articles to be 
+    #   retrieved
+    def get_jobs(self,api):
+        
+        self.logger.debug("API: %s", api['name'])
+        
+        # The canonical urls of the articles seen in the previous pages
+        seen = set()
+        
+        # For each page of snippets ...
+        for articles in self.snippet_pages(api):
+            
+            if not articles:
+                continue
+            
+            # The paths of the title and url fields of the snippets
+            title_path, url_path = self.get_field_paths(api, articles[0])
+            
+            # The (title, url, source) of the articles of the page
+            jobs = []
             
-            # recursively traverse the tree structure to find the sought key
-            for key in keys:
-                return self.get_element(article[key],element)
+            # The canonical urls of the articles of the page
+            page_urls = set()
+            
+            # For each article in the language of the api, if specified, 
+            # and from a supported publication ...
+            for article, url, rule in filter_snippets(articles, lang=api.get("lang"),
+                                                      route=self.router.route,
+                                                      url_path=url_path):
+                
+                # Skip the articles that appear more than once in the snippets
+                canonical = self.canonical_url(url)
+                if canonical in seen or canonical in page_urls:
+                    continue
+                
+                # Retrieve the title of the article
+                title = get_path(article, title_path)
+                
+                jobs.append((title,url,rule.name))
+                page_urls.add(canonical)
+            
+            seen.update(page_urls)
+            
+            # Skip the articles that are already stored in the database
+            stored = self.stored_urls(page_urls)
+            
+            self.logger.debug("Skipped %d stored articles", len(stored))
+            self.metrics.count("articles_stored_skipped", len(stored))
+            
+            for job in jobs:
+                if self.canonical_url(job[1]) not in stored:
+                    yield job
+    
+    #========================================================================
+    # This method builds the row of an article to be stored in the database.
+    #
+    # Input:
+    #   title - the title of the article
+    #   url - the url of the article
+    #   source - the publication of the article
+    #   webpage - the webpage of the article
+    #
+    # Return:
+    #   the (title, text, canonical url, content hash) tuple
+    def build_article(self,title,url,source,webpage):
+        
+        # Retrieve the article text
+        with self.metrics.stage("parse"):
+            text = self.extract_text(webpage,source)
+        
+        self.metrics.count("bytes_parsed", len(webpage))
+        
+        return (title,text,self.canonical_url(url),self.content_hash(text))
     
     #========================================================================
-    # This method retrieves the article snippets from the api-specific
-    # text files, filters them to only those in a specific language. For each 
+    # This method retrieves the article snippets of the apis, filters them
+    # to only those in a specific language. For each 
     # of the remaining article snippets, it retrieves the title and the 
     # contents, places them into a tuple, and appends the tuple to the 
     # article_list instance list variable.
@@ -176,79 +444,135 @@ class Scraper:
         # Initialize the article_list instance list variable
         self.article_list = []
         
-        # Retrieve the list of supported sources (publications) from
-        # the config file.
-        sources = scraping_config.article_text.keys()
-        
         # Retrieve the list of supported apis ...
         apis = scraping_config.apis
         
         # For each api ...
         for api in apis: 
             
-            self.logger.debug("API: {}".format(api['name']))
+            # Retrieve the articles to be retrieved
+            jobs = list(self.get_jobs(api))
             
-            # Open the api text file for reading ...
-            file = open(api['file'],"r")
-            
-            # Read in the contents of the api text file ...
-            text = file.readlines()
-
-            # For each item in the api text file ...
-            for item in text:
-                
-                # Load the contents as JSON ...
-                payload = json.loads(item)
-                
-                # If the language is specified for the api ...
-                if "lang" in api.keys():
-                    
-                    # Filter the contents to only the articles that are in 
-                    # the specified language
-                    articles = self.language(payload[api["article-list"]], lang=api["lang"])
-                else:
-                    
-                    # Otherwise, use the entire list of articles
-                    articles = payload[api["article-list"]]
+            # Retrieve the article webpages concurrently
+            with self.metrics.stage("fetch", items=len(jobs)):
+                webpages = self.fetcher.fetch_all([url for _, url, _ in jobs])
             
+            self.count_webpages(webpages)
             
-            self.logger.debug("Process articles")
-            
-            # For each article ...
-            for article in articles:
-                
-                # Retrieve the url ...
-                url = self.get_element(article=article,element="url")
+            # For each retrieved article, in the order of the snippets ...
+            for (title,url,source), webpage in zip(jobs,webpages):
                 
                 # Exception handling ...
                 try:
-                
-                    # Iterate through the supported publications ...
-                    for source in sources:
-                        
-                        # If the url is from the publication ...
-                        if source in url:
-                            
-                            # Retrieve the title of the article
-                            title = self.get_element(article,"title") 
-                            
-                            # Retrieve the article text
-                            text = self.get_article(url,source)
-                            
-                            # Place the title and text into a tuple and 
-                            # append the tuple to the article_list instance
-                            # variable
-                            self.article_list.append((
-                                title,text
-                            ))
+                    
+                    # Re-raise the error of a failed retrieval
+                    if isinstance(webpage, Exception):
+                        raise webpage
+                    
+                    # Place the title, text, canonical url and content 
+                    # hash into a tuple and append the tuple to the 
+                    # article_list instance variable
+                    self.article_list.append(
+                        self.build_article(title,url,source,webpage))
                 
                 # Catch and log exceptions
                 except Exception as e:
                     self.logger.error("Cound not retrieve article from {}.\n Error = {}".
                                     format(url, e))
-                    
+        
+        self.log_http_stats()
+    
+    #========================================================================
+    # This method counts the webpages downloaded, and their bytes.
+    #
+    # Input:
+    #   webpages - the webpages, or the errors of the failed downloads
+    #
+    # Return:
+    #   None
+    def count_webpages(self,webpages):
+        
+        downloaded = [webpage for webpage in webpages if not isinstance(webpage, Exception)]
+        
+        self.metrics.count("articles_fetched", len(downloaded))
+        self.metrics.count("bytes_fetched", sum(len(webpage) for webpage in downloaded))
+        self.metrics.count("fetch_errors", len(webpages) - len(downloaded))
+    
+    #========================================================================
+    # This method logs the statistics of the HTTP connection pool and of the
+    # response cache.
+    #
+    # Input:
+    #   None
+    #
+    # Return:
+    #   None
+    def log_http_stats(self):
+        
+        self.logger.info("HTTP pool: {}".format(self.http.stats()))
+        
+        if self.cache is not None:
+            self.logger.info("HTTP cache: {}".format(self.cache.stats()))
+    
+    #========================================================================
+    # This method logs the stage timings and counters of the run, and 
+    # exports them to the metrics directory specified in the config file.
+    #
+    # Input:
+    #   None
+    #
+    # Return:
+    #   None
+    def report_metrics(self):
+        
+        self.metrics.log(self.logger)
+        
+        if scraping_config.metrics_dir:
+            try:
+                self.metrics.export(scraping_config.metrics_dir,
+                                    scraping_config.metrics_format)
+            except Exception as e:
+                self.logger.error(f"Error exporting the metrics: {e}")
+    
     #========================================================================
-    # This method returns the connection to the sqlite database
+    # This method retrieves, parses and saves the articles of all the apis
+    # in a pipeline: the webpages are downloaded by fetcher threads, parsed
+    # by parser threads and inserted by a writer thread that commits every
+    # few articles, all the stages running at the same time.
+    #
+    # Input:
+    #   None
+    #
+    # Return:
+    #   None
+    def run_pipeline(self):
+        
+        jobs = itertools.chain.from_iterable(
+            self.get_jobs(api) for api in scraping_config.apis)
+        
+        pipeline = ScrapePipeline(self,
+                                  fetch_workers=scraping_config.fetch_max_workers,
+                                  parse_workers=scraping_config.pipeline_parse_workers,
+                                  queue_size=scraping_config.pipeline_queue_size,
+                                  commit_every=scraping_config.pipeline_commit_every)
+        written = pipeline.run(jobs)
+        
+        for stage in pipeline.stages:
+            self.logger.info("Stage {}".format(stage.stats()))
+        
+        # The articles are stored: move the api high-water marks forward,
+        # unless some of them could not be, so that the next run retrieves
+        # them again
+        if written:
+            self.save_cursors()
+        else:
+            self.logger.error("Some articles were not saved, keeping the api cursors")
+        
+        self.log_http_stats()
+    
+    #========================================================================
+    # This method returns the connection to the sqlite database, with the 
+    # journal mode and synchronous setting specified in the config file.
     #
     # Input:
     #   None
@@ -256,34 +580,205 @@ class Scraper:
     # Return:
     #   None
     def get_db_connection(self):
-        return sqlite3.connect(scraping_config.db_file)
+        conn = sqlite3.connect(scraping_config.db_file)
+        
+        if scraping_config.db_journal_mode:
+            conn.execute(f"PRAGMA journal_mode={scraping_config.db_journal_mode}")
+        
+        if scraping_config.db_synchronous:
+            conn.execute(f"PRAGMA synchronous={scraping_config.db_synchronous}")
+        
+        return conn
     
     #========================================================================
-    # This method saves the contents of the article_list instance list
-    # variable and inserts them into the sqlite database.
+    # This method adds the url and content_hash columns to the articles 
+    # table, if they are missing, together with the unique indexes that 
+    # prevent an article from being stored twice, and creates the table of
+    # the api high-water marks. The schema is only checked once per Scraper.
     #
     # Input:
+    #   conn - the database connection
+    #
+    # Return:
     #   None
+    def ensure_schema(self,conn):
+        with self.schema_lock:
+            if not self.schema_ready:
+                self.create_schema(conn)
+                self.schema_ready = True
+    
+    #========================================================================
+    # This method creates the missing columns, indexes and tables of the
+    # schema.
+    #
+    # Input:
+    #   conn - the database connection
     #
     # Return:
     #   None
-    def save_articles(self):
+    def create_schema(self,conn):
+        table = scraping_config.db_table
         
-        self.logger.debug("Saving articles .....")
+        columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+        
+        with conn:
+            for column in ("url", "content_hash"):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} TEXT")
+                
+                conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS "
+                             f"idx_{table}_{column} ON {table} ({column})")
+            
+            conn.execute("CREATE TABLE IF NOT EXISTS api_cursors "
+                         "(name TEXT PRIMARY KEY, published_at TEXT)")
+    
+    #========================================================================
+    # This method returns the canonical form of an article url: the scheme
+    # and host in lower case, without the default port, the fragment or a
+    # trailing slash, and with the query parameters sorted, less those that
+    # only track the origin of the visit (utm_*, fbclid, gclid, ...). The
+    # other parameters are kept, since they may identify the article.
+    #
+    # Input:
+    #   url - the url of the article
+    #
+    # Return:
+    #   the canonical url
+    def canonical_url(self,url):
+        parts = urllib.parse.urlsplit(url.strip())
+        
+        scheme = parts.scheme.lower()
+        host = (parts.hostname or "")
+        if parts.port and parts.port != {"http": 80, "https": 443}.get(scheme):
+            host = "{}:{}".format(host, parts.port)
+        
+        path = parts.path.rstrip("/") or "/"
+        
+        params = [(name, value) for name, value 
+                  in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+                  if not name.lower().startswith("utm_") 
+                  and name.lower() not in TRACKING_PARAMS]
+        query = urllib.parse.urlencode(sorted(params))
+        
+        return urllib.parse.urlunsplit((scheme, host, path, query, ""))
+    
+    #========================================================================
+    # This method returns the hash of the text of an article.
+    #
+    # Input:
+    #   text - the text of the article
+    #
+    # Return:
+    #   the SHA-256 hash of the text
+    def content_hash(self,text):
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+    
+    #========================================================================
+    # This method returns which of the given canonical urls are already 
+    # stored in the database, looking them up in bulk.
+    #
+    # Input:
+    #   urls - the canonical urls
+    #
+    # Return:
+    #   the set of the urls that are already stored
+    def stored_urls(self,urls):
+        urls = list(urls)
+        stored = set()
         
         try:
+            conn = self.get_db_connection()
+            self.ensure_schema(conn)
             
-            # Get a database connection
+            # Look the urls up in batches, within sqlite's parameter limit
+            for i in range(0, len(urls), 500):
+                batch = urls[i:i + 500]
+                sql = "SELECT url FROM {} WHERE url IN ({})".format(
+                    scraping_config.db_table, ", ".join("?" * len(batch)))
+                stored.update(row[0] for row in conn.execute(sql, batch))
+            
+            conn.close()
+        
+        except Exception as e:
+            self.logger.error(f"Error looking up stored articles: {e}")
+        
+        return stored
+    
+    #========================================================================
+    # This method returns the published_at high-water mark of an api, that
+    # is the publication time of the newest snippet retrieved by the 
+    # previous runs.
+    #
+    # Input:
+    #   name - the name of the api
+    #
+    # Return:
+    #   the high-water mark in ISO format, or None on the first run
+    def get_cursor(self,name):
+        try:
             conn = self.get_db_connection()
+            self.ensure_schema(conn)
+            row = conn.execute("SELECT published_at FROM api_cursors WHERE name = ?",
+                               (name,)).fetchone()
+            conn.close()
+        
+        except Exception as e:
+            self.logger.error(f"Error reading the cursor of {name}: {e}")
+            return None
+        
+        return row[0] if row else None
+    
+    #========================================================================
+    # This method saves the high-water marks reached by the api calls of
+    # this run. It is called once their articles have been stored.
+    #
+    # Input:
+    #   None
+    #
+    # Return:
+    #   None
+    def save_cursors(self):
+        if not self.cursors:
+            return
+        
+        try:
+            conn = self.get_db_connection()
+            self.ensure_schema(conn)
             
-            # Get a cursor from the connection
-            cursor = conn.cursor()
+            with conn:
+                conn.executemany("INSERT INTO api_cursors (name, published_at) "
+                                 "VALUES (?, ?) ON CONFLICT(name) DO UPDATE "
+                                 "SET published_at = excluded.published_at",
+                                 self.cursors.items())
+            conn.close()
             
-            # Insert the contents of the article_list instance list variable
-            # into the database table specified in the config file
+            self.logger.debug("Saved the api cursors: %s", self.cursors)
+        
+        except Exception as e:
+            self.logger.fatal(f"Error saving the api cursors: {e}")
+    
+    #========================================================================
+    # This method inserts articles into the database table specified in the
+    # config file, in one transaction. Articles whose url or text is already
+    # stored are ignored.
+    #
+    # Input:
+    #   conn - the database connection
+    #   articles - the (title, text, canonical url, content hash) tuples
+    #
+    # Return:
+    #   None
+    def insert_articles(self,conn,articles):
+        
+        # Get a cursor from the connection
+        cursor = conn.cursor()
+        
+        with self.metrics.stage("write", items=len(articles)):
             cursor.executemany("""
-            INSERT INTO {} ('title', 'article')
-            VALUES (?, ?)""".format(scraping_config.db_table), self.article_list)
+            INSERT OR IGNORE INTO {} ('title', 'article', 'url', 'content_hash')
+            VALUES (?, ?, ?, ?)""".format(scraping_config.db_table), articles)
+            
+            inserted = cursor.rowcount
             
             # Close the cursor
             cursor.close()
@@ -291,6 +786,35 @@ class Scraper:
             # Commimt the transaction
             conn.commit()
         
+        self.metrics.count("articles_written", inserted)
+    
+    #========================================================================
+    # This method saves the contents of the article_list instance list
+    # variable and inserts them into the sqlite database. Articles whose 
+    # url or text is already stored are ignored.
+    #
+    # Input:
+    #   None
+    #
+    # Return:
+    #   None
+    def save_articles(self):
+        
+        self.logger.debug("Saving articles .....")
+        
+        try:
+            
+            # Get a database connection
+            conn = self.get_db_connection()
+            self.ensure_schema(conn)
+            
+            # Insert the contents of the article_list instance list variable
+            # into the database table specified in the config file
+            self.insert_articles(conn,self.article_list)
+            
+            # The articles are stored: move the api high-water marks forward
+            self.save_cursors()
+        
         except Exception as e:
             self.logger.fatal(f"Error connecting to database: {e}")
     
@@ -299,11 +823,21 @@ if __name__ == "__main__":
     # Instantiate the Scraper class    
     scraper = Scraper()
     
-    # Retrieve the articles
-    scraper.get_articles()
-    
-    # Parse the articles and place them into the article_list instance variable
-    scraper.parse_articles()
+    # Profile the run, if the config file says so
+    with profiled(scraping_config.profiler, scraping_config.profile_dir, "scraper"):
+        
+        if scraping_config.scrape_pipeline:
+            
+            # Retrieve, parse and save the articles in a pipeline
+            scraper.run_pipeline()
+        
+        else:
+            
+            # Parse the articles and place them into the article_list instance variable
+            scraper.parse_articles()
+            
+            # Save the articles to the database
+            scraper.save_articles()
     
-    # Save the articles to the database
-    scraper.save_articles()
+    # Log and export the stage timings and counters of the run
+    scraper.report_metrics()
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+Snippet Reader
+
+This module reads the article snippets of the api responses saved to a text
+file, one response per line, without loading the whole file. The file is
+parsed one line at a time, with orjson or ujson when installed. A response
+too large to be held in memory is parsed incrementally with ijson, when
+installed, so that memory stays flat however large the responses are. Every
+snippet of every line is yielded, and the language and source filters are
+applied lazily, as the snippets are read.
+
+"""
+
+# Import the dependencies
+import itertools
+
+# Import the incremental parser, if installed
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Import the fastest JSON parser installed
+try:
+    from orjson import loads
+except ImportError:
+    try:
+        from ujson import loads
+    except ImportError:
+        from json import loads
+
+
+# The size beyond which a line is parsed incrementally, in bytes
+MAX_LINE = 16 * 2**20
+
+
+#========================================================================
+# This function reads the snippets of the api responses saved to a file,
+# one response per line.
+#
+# Input:
+#   path - the path of the file
+#   list_key - the key of the list of snippets in each response
+#   encoding - the encoding of the file
+#
+# Return:
+#   a generator of the snippets, in the order of the file
+def read_snippets(path, list_key, encoding="utf-8"):
+
+    # ijson parses the utf-8 bytes of the file
+    incremental = ijson is not None and encoding.replace("-", "").lower() == "utf8"
+
+    with open(path, "rb") as file:
+        while True:
+            position = file.tell()
+            line = file.readline(MAX_LINE)
+            if not line:
+                return
+
+            # Parse the rest of the file incrementally from an oversized line
+            if len(line) == MAX_LINE and not line.endswith(b"\n"):
+                if incremental:
+                    file.seek(position)
+                    yield from ijson.items(file, list_key + ".item",
+                                           multiple_values=True, use_float=True)
+                    return
+
+                line += file.readline()
+
+            if line.strip():
+                yield from loads(line.decode(encoding)).get(list_key, ())
+
+
+#========================================================================
+# This function finds the path of a field in a snippet: the configured
+# dotted path if the snippet has it, or else the path of the first key of
+# that name found in the nested objects of the snippet. The path is meant
+# to be resolved once per api, the snippets of an api sharing their schema.
+#
+# Input:
+#   snippet - a snippet of the api
+#   field - the field name, or its dotted path
+#
+# Return:
+#   the tuple of the keys leading to the field, or None if it is not found
+def resolve_path(snippet, field):
+    path = tuple(field.split("."))
+
+    if get_path(snippet, path) is not None:
+        return path
+
+    # Search the nested objects, breadth first
+    queue = [((), snippet)]
+
+    for prefix, node in queue:
+        if path[-1] in node:
+            return prefix + (path[-1],)
+
+        queue.extend((prefix + (key,), value) for key, value in node.items()
+                     if isinstance(value, dict))
+
+    return None
+
+
+#========================================================================
+# This function returns the field of a snippet at the specified path.
+#
+# Input:
+#   snippet - the snippet
+#   path - the tuple of the keys leading to the field
+#
+# Return:
+#   the field, or None if the snippet does not have it
+def get_path(snippet, path):
+    value = snippet
+
+    for key in path:
+        try:
+            value = value[key]
+        except (KeyError, TypeError):
+            return None
+
+    return value
+
+
+#========================================================================
+# This function filters the snippets to those in the specified language and
+# from a supported publication.
+#
+# Input:
+#   snippets - the iterable of snippets
+#   lang - the language to which the snippets are limited, or None
+#   route - the function returning the extraction rule of a url, or None
+#           if the publication is not supported; None to keep all the
+#           publications
+#   url_path - the path of the url field of the snippets
+#
+# Return:
+#   a generator of the (snippet, url, rule) of the snippets kept, the rule
+#   being None when the publications are not filtered
+def filter_snippets(snippets, lang=None, route=None, url_path=("url",)):
+
+    if lang is not None:
+        snippets = (snippet for snippet in snippets if snippet.get("language") == lang)
+
+    for snippet in snippets:
+        url = get_path(snippet, url_path)
+
+        if route is None:
+            yield snippet, url, None
+            continue
+
+        rule = route(url)
+        if rule is not None:
+            yield snippet, url, rule
+
+
+#========================================================================
+# This function groups the items of an iterable into lists.
+#
+# Input:
+#   iterable - the items
+#   size - the maximum number of items of a list
+#
+# Return:
+#   a generator of the lists of items
+def batched(iterable, size):
+    iterator = iter(iterable)
+
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+
+        yield batch
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+Stub News API
+
+This script starts a local stand-in for the mediastack api, so that the
+paginated ingestion can be tested without spending api quota. The stand-in
+serves the snippets newest first at /v1/news, paged with the offset and
+limit parameters and with mediastack's pagination block, and serves an
+article page at the url of each snippet. The snippets are generated, each
+new batch being published after the previous ones.
+
+Usage (from the API Scraper folder):
+    python stub_api.py [--port PORT] [--count NUMBER OF SNIPPETS]
+
+then point the api of the config file to the stand-in, with 'scheme' set
+to 'http' and 'url' set to '127.0.0.1:PORT', and add an article_text entry
+for the '127.0.0.1' host with the css elements of the yahoo.com entry.
+
+"""
+
+# Import the dependencies
+import argparse
+import json
+import threading
+import urllib.parse
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Class StubAPIHandler
+class StubAPIHandler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        parts = urllib.parse.urlsplit(self.path)
+
+        if parts.path == "/v1/news":
+            params = urllib.parse.parse_qs(parts.query)
+            offset = int(params.get("offset", ["0"])[0])
+            limit = int(params.get("limit", ["25"])[0])
+
+            body = json.dumps(self.server.page(offset, limit)).encode("utf-8")
+            content_type = "application/json"
+
+        elif parts.path in self.server.pages:
+            body = self.server.pages[parts.path].encode("utf-8")
+            content_type = "text/html; charset=utf-8"
+
+        else:
+            self.send_error(404)
+            return
+
+        self.server.requests.append(self.path)
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# Class StubAPIServer
+class StubAPIServer(ThreadingHTTPServer):
+
+    request_queue_size = 256
+
+    #========================================================================
+    # Class constructor
+    #
+    # Input:
+    #   address - the (host, port) address the stand-in listens on
+    def __init__(self, address):
+        super().__init__(address, StubAPIHandler)
+
+        self.base_url = "http://{}:{}".format(*self.server_address[:2])
+        self.lock = threading.Lock()
+
+        # The snippets, newest first, and the article page of each url path
+        self.snippets = []
+        self.pages = {}
+
+        # The paths requested, in order
+        self.requests = []
+
+        self.clock = datetime(2021, 1, 1, tzinfo=timezone.utc)
+
+    #========================================================================
+    # This method publishes new snippets, newer than all the previous ones,
+    # one minute apart.
+    #
+    # Input:
+    #   count - the number of snippets
+    #   language - the language of the snippets
+    #
+    # Return:
+    #   None
+    def publish(self, count, language="en"):
+        with self.lock:
+            for _ in range(count):
+                self.clock += timedelta(minutes=1)
+                number = len(self.pages)
+                path = "/finance.yahoo.com/news/article-{}.html".format(number)
+
+                self.pages[path] = ("<html><body><div class='caas-body'><p>Article {}</p>"
+                                    "<p>Published {}</p></div></body></html>"
+                                    .format(number, self.clock.isoformat()))
+
+                self.snippets.insert(0, {
+                    "author": None,
+                    "title": "Article {}".format(number),
+                    "description": "Article {}".format(number),
+                    "url": self.base_url + path,
+                    "source": "Yahoo | Business Finance",
+                    "category": "business",
+                    "language": language,
+                    "country": "us",
+                    "published_at": self.clock.isoformat(),
+                })
+
+    #========================================================================
+    # This method returns a page of snippets, newest first.
+    #
+    # Input:
+    #   offset - the number of snippets skipped
+    #   limit - the maximum number of snippets of the page
+    #
+    # Return:
+    #   the json payload of the page
+    def page(self, offset, limit):
+        with self.lock:
+            data = self.snippets[offset:offset + limit]
+
+            return {
+                "pagination": {"limit": limit, "offset": offset,
+                               "count": len(data), "total": len(self.snippets)},
+                "data": data,
+            }
+
+
+#========================================================================
+# This function starts the stand-in in a background thread.
+#
+# Input:
+#   count - the number of snippets initially published
+#   port - the port to listen on, any free port by default
+#
+# Return:
+#   the stand-in server
+def serve_stub(count=250, port=0):
+    server = StubAPIServer(("127.0.0.1", port))
+    server.publish(count)
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Serve a stand-in for the news api")
+    parser.add_argument("--port", type=int, default=8765, help="port to listen on")
+    parser.add_argument("--count", type=int, default=250, help="number of snippets")
+    args = parser.parse_args()
+
+    server = StubAPIServer(("127.0.0.1", args.port))
+    server.publish(args.count)
+
+    print("Serving {} snippets at {}/v1/news".format(args.count, server.base_url))
+    server.serve_forever()
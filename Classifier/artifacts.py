@@ -0,0 +1,571 @@
+# -*- coding: utf-8 -*-
+
+# =============================================================================
+# Model Artifact Bundle
+#
+# This module converts the pickled TF-IDF vectorizer, logistic regression
+# model and label encoder into a compact bundle of numpy arrays, and loads
+# the bundle back. The arrays are memory-mapped when the bundle is loaded, so
+# that loading it costs next to nothing and the pages of the arrays are
+# shared by all the processes that load the same bundle.
+#
+# The bundle directory holds:
+#   terms.npy   - the vocabulary, UTF-8 encoded and sorted, in fixed-width
+#                 slots of TERM_WIDTH bytes (the few longer terms are kept
+#                 in meta.json)
+#   columns.npy - the feature column of each sorted term
+#   idf.npy     - the inverse document frequency of each feature column
+#   coef.npy    - the model coefficient of each feature column
+#   meta.json   - the intercept, the class order and the vectorizer settings
+#
+# It also holds a pruned index of the vocabulary, for the TokenVectorizer:
+#   index_terms.txt      - the terms with a non-zero coefficient, one per line,
+#                          loaded into a hash index
+#   index_norm_terms.npy - the terms with a zero coefficient, which only count
+#                          towards the norm of the vectors, sorted in
+#                          fixed-width slots as in terms.npy (the few longer
+#                          terms are kept in meta.json); memory-mapped, and
+#                          only saved when the vectors are normalized
+#   index_idf.npy        - the inverse document frequency of the terms with
+#                          a non-zero coefficient, then of the sorted and the
+#                          longer terms with a zero coefficient
+#   index_coef.npy       - the coefficient of each term with a non-zero
+#                          coefficient
+#
+# Usage (from the Classifier folder), to convert the pickles identified in
+# the config file into the bundle directory identified in the config file:
+#   python artifacts.py
+#
+# =============================================================================
+
+
+# Import the dependencies
+import json
+import os
+import re
+from collections import Counter
+
+from functools import cached_property
+
+import numpy as np
+import scipy.sparse
+
+# Import the config file
+import scraping_config
+
+
+# The width of the vocabulary slots, in bytes
+TERM_WIDTH = 32
+
+
+#========================================================================
+# This function returns the norms of the rows of a sparse matrix.
+#
+# Input:
+#   values - the values of the rows, one row after the other
+#   indptr - the offsets of the values of each row
+#   norm - the norm, "l2" or "l1"
+#
+# Return:
+#   the array of row norms, 1 for the empty rows
+#========================================================================
+def row_norms(values, indptr, norm):
+    lengths = np.diff(indptr)
+    rows = np.repeat(np.arange(len(lengths)), lengths)
+
+    if norm == "l2":
+        norms = np.sqrt(np.bincount(rows, weights=values * values, minlength=len(lengths)))
+    else:
+        norms = np.bincount(rows, weights=np.abs(values), minlength=len(lengths))
+
+    norms[lengths == 0] = 1.0
+
+    return norms
+
+
+#========================================================================
+# This function reads the terms of a text file holding one term per line.
+#
+# Input:
+#   path - the path of the file
+#
+# Return:
+#   the list of terms
+#========================================================================
+def read_terms(path):
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+
+    return text.split("\n") if text else []
+
+
+# Class BundleVectorizer
+class BundleVectorizer:
+
+    #========================================================================
+    # Class constructor
+    #
+    # Input:
+    #   terms - the sorted array of UTF-8 encoded vocabulary terms
+    #   columns - the feature column of each sorted term
+    #   idf - the inverse document frequency of each feature column
+    #   meta - the vectorizer settings
+    #========================================================================
+    def __init__(self, terms, columns, idf, meta):
+        self.terms = terms
+        self.columns = columns
+        self.idf = idf
+
+        # The terms too long for the vocabulary slots
+        self.long_terms = meta["long_terms"]
+
+        self.token_pattern = re.compile(meta["token_pattern"])
+        self.lowercase = meta["lowercase"]
+        self.binary = meta["binary"]
+        self.sublinear_tf = meta["sublinear_tf"]
+        self.use_idf = meta["use_idf"]
+        self.norm = meta["norm"]
+
+
+    # ========================================================================
+    # This method returns the feature columns of the specified terms. Each
+    # distinct term is looked up once, by binary search in the sorted 
+    # vocabulary.
+    #
+    # Input:
+    #     tokens - the list of terms
+    # Return:
+    #     the array of feature columns, -1 for terms not in the vocabulary
+    # ========================================================================
+    def lookup(self, tokens):
+        distinct = {}
+        ids = np.array([distinct.setdefault(token, len(distinct)) for token in tokens],
+                       dtype=np.intp)
+
+        keys = [token.encode("utf-8") for token in distinct]
+        columns = np.full(len(keys), -1, dtype=np.intp)
+
+        short = np.array([len(key) <= TERM_WIDTH for key in keys], dtype=bool)
+        if short.any() and len(self.terms):
+            short_keys = np.array([key for key in keys if len(key) <= TERM_WIDTH],
+                                  dtype=self.terms.dtype)
+            positions = np.minimum(np.searchsorted(self.terms, short_keys),
+                                   len(self.terms) - 1)
+            columns[short] = np.where(self.terms[positions] == short_keys,
+                                      self.columns[positions], -1)
+
+        for i in np.flatnonzero(~short):
+            columns[i] = self.long_terms.get(keys[i].decode("utf-8"), -1)
+
+        return columns[ids]
+
+
+    # ========================================================================
+    # This method returns the term counts of the specified texts.
+    #
+    # Input:
+    #     texts - the iterable of texts
+    # Return:
+    #     the terms of every text, their counts, and the offsets of each
+    #     text's terms
+    # ========================================================================
+    def count(self, texts):
+        tokens = []
+        counts = []
+        indptr = [0]
+
+        for text in texts:
+            if self.lowercase:
+                text = text.lower()
+
+            text_counts = Counter(self.token_pattern.findall(text))
+            tokens.extend(text_counts.keys())
+            counts.extend(text_counts.values())
+            indptr.append(len(tokens))
+
+        return tokens, counts, indptr
+
+
+    # ========================================================================
+    # This method builds the TF-IDF matrix of the specified term counts,
+    # weighting and normalizing it as the fitted TfidfVectorizer does.
+    #
+    # Input:
+    #     columns - the feature column of each term (-1 if not in the
+    #               vocabulary)
+    #     counts - the count of each term
+    #     indptr - the offsets of each text's terms
+    # Return:
+    #     the CSR matrix of TF-IDF vectors
+    # ========================================================================
+    def weigh(self, columns, counts, indptr):
+        n_docs = len(indptr) - 1
+        doc_ids = np.repeat(np.arange(n_docs), np.diff(indptr))
+        values = np.asarray(counts, dtype=np.float64)
+
+        known = columns >= 0
+        X = scipy.sparse.csr_matrix((values[known], (doc_ids[known], columns[known])),
+                                    shape=(n_docs, len(self.idf)), dtype=np.float64)
+        X.sort_indices()
+
+        if self.binary:
+            X.data.fill(1)
+
+        if self.sublinear_tf:
+            np.log(X.data, X.data)
+            X.data += 1
+
+        if self.use_idf:
+            X.data *= self.idf[X.indices]
+
+        if self.norm:
+            X.data /= np.repeat(row_norms(X.data, X.indptr, self.norm), np.diff(X.indptr))
+
+        return X
+
+
+    # ========================================================================
+    # This method transforms texts into TF-IDF vectors. The vectors are the
+    # same, up to floating-point rounding, as those of the fitted
+    # TfidfVectorizer the bundle was converted from.
+    #
+    # Input:
+    #     texts - the iterable of texts
+    # Return:
+    #     the CSR matrix of TF-IDF vectors
+    # ========================================================================
+    def transform(self, texts):
+        tokens, counts, indptr = self.count(texts)
+
+        return self.weigh(self.lookup(tokens), counts, indptr)
+
+
+# Class TokenVectorizer
+class TokenVectorizer:
+
+    # The number of lemmas whose feature columns are remembered
+    CACHE_SIZE = 200000
+
+    #========================================================================
+    # Class constructor
+    #
+    # Input:
+    #   terms - the list of the terms with a non-zero coefficient
+    #   norm_terms - the sorted array of UTF-8 encoded terms with a zero
+    #                coefficient, which only count towards the norm of the
+    #                vectors
+    #   idf - the inverse document frequency of the terms, then of the
+    #         sorted and the long norm terms
+    #   meta - the vectorizer settings
+    #========================================================================
+    def __init__(self, terms, norm_terms, idf, meta):
+        self.terms = terms
+        self.norm_terms = norm_terms
+        self.idf = idf
+        self.n_scoring = len(terms)
+
+        # The norm terms too long for the vocabulary slots, and their
+        # offsets past the sorted norm terms
+        self.long_norm_terms = meta["index_long_norm_terms"]
+
+        self.token_pattern = re.compile(meta["token_pattern"])
+        self.lowercase = meta["lowercase"]
+        self.binary = meta["binary"]
+        self.sublinear_tf = meta["sublinear_tf"]
+        self.use_idf = meta["use_idf"]
+        self.norm = meta["norm"]
+
+        # The feature columns of the lemmas seen so far
+        self.lemma_columns = {}
+
+
+    # ========================================================================
+    # The hash index of the terms with a non-zero coefficient, mapping each
+    # term to its column, built on first use.
+    # ========================================================================
+    @cached_property
+    def index(self):
+        return {term: column for column, term in enumerate(self.terms)}
+
+
+    # ========================================================================
+    # This method returns the column of a term with a zero coefficient, by
+    # binary search in the sorted norm terms. The columns of the norm terms
+    # come after those of the terms with a non-zero coefficient.
+    #
+    # Input:
+    #     term - the term
+    # Return:
+    #     the column of the term, or None if it is not in the vocabulary
+    # ========================================================================
+    def norm_column(self, term):
+        key = term.encode("utf-8")
+
+        if len(key) > TERM_WIDTH:
+            offset = self.long_norm_terms.get(term)
+            return None if offset is None else self.n_scoring + offset
+
+        position = int(np.searchsorted(self.norm_terms, key))
+        if position < len(self.norm_terms) and self.norm_terms[position] == key:
+            return self.n_scoring + position
+
+        return None
+
+
+    # ========================================================================
+    # This method returns the feature columns of a lemma. The lemma is
+    # tokenized with the token pattern of the fitted vectorizer, so that
+    # lemmas such as "-PRON-" map to the same terms as in the joined text.
+    #
+    # Input:
+    #     lemma - the lemma
+    # Return:
+    #     the tuple of the columns of the lemma's terms found in the index
+    # ========================================================================
+    def columns(self, lemma):
+        columns = self.lemma_columns.get(lemma)
+
+        if columns is None:
+            index = self.index
+            text = lemma.lower() if self.lowercase else lemma
+
+            columns = []
+            for term in self.token_pattern.findall(text):
+                column = index.get(term)
+                if column is None and self.norm:
+                    column = self.norm_column(term)
+                if column is not None:
+                    columns.append(column)
+            columns = tuple(columns)
+
+            if len(self.lemma_columns) >= self.CACHE_SIZE:
+                self.lemma_columns.clear()
+            self.lemma_columns[lemma] = columns
+
+        return columns
+
+
+    # ========================================================================
+    # This method transforms lists of lemmas into TF-IDF vectors over the
+    # terms with a non-zero coefficient. The other terms still count towards
+    # the norm of the vectors, so that the values are the same, up to 
+    # floating-point rounding, as those of the fitted TfidfVectorizer applied
+    # to the lemmas joined by spaces.
+    #
+    # Input:
+    #     token_lists - the iterable of lists of lemmas
+    # Return:
+    #     the CSR matrix of TF-IDF vectors, with one column per term with a
+    #     non-zero coefficient
+    # ========================================================================
+    def transform_tokens(self, token_lists):
+        lemma_columns = self.lemma_columns.get
+
+        columns = []
+        indptr = [0]
+
+        for tokens in token_lists:
+            for lemma in tokens:
+                lemma_column = lemma_columns(lemma)
+                if lemma_column is None:
+                    lemma_column = self.columns(lemma)
+                columns.extend(lemma_column)
+
+            indptr.append(len(columns))
+
+        # Count the terms of each article, sorted by row and column
+        n_docs = len(indptr) - 1
+        doc_ids = np.repeat(np.arange(n_docs), np.diff(indptr))
+        keys, counts = np.unique(doc_ids * len(self.idf) + np.array(columns, dtype=np.intp),
+                                 return_counts=True)
+
+        doc_ids, columns = np.divmod(keys, len(self.idf))
+        values = counts.astype(np.float64)
+        indptr = np.zeros(n_docs + 1, dtype=np.intp)
+        np.cumsum(np.bincount(doc_ids, minlength=n_docs), out=indptr[1:])
+
+        if self.binary:
+            values.fill(1)
+
+        if self.sublinear_tf:
+            np.log(values, values)
+            values += 1
+
+        if self.use_idf:
+            values *= self.idf[columns]
+
+        if self.norm:
+            values /= np.repeat(row_norms(values, indptr, self.norm), np.diff(indptr))
+
+        # Keep the terms with a non-zero coefficient
+        scoring = columns < self.n_scoring
+        scoring_indptr = np.zeros(n_docs + 1, dtype=np.intp)
+        np.cumsum(np.bincount(doc_ids[scoring], minlength=n_docs), out=scoring_indptr[1:])
+
+        return scipy.sparse.csr_matrix(
+            (values[scoring], columns[scoring], scoring_indptr),
+            shape=(n_docs, self.n_scoring))
+
+
+    # ========================================================================
+    # This method transforms texts of space-separated lemmas into TF-IDF
+    # vectors.
+    #
+    # Input:
+    #     texts - the iterable of texts
+    # Return:
+    #     the CSR matrix of TF-IDF vectors
+    # ========================================================================
+    def transform(self, texts):
+        return self.transform_tokens(text.split() for text in texts)
+
+
+# Class ModelBundle
+class ModelBundle:
+
+    #========================================================================
+    # Class constructor. The arrays of the bundle are memory-mapped.
+    #
+    # Input:
+    #   directory - the bundle directory
+    #   mmap - whether the arrays are memory-mapped rather than read
+    #   pruned - whether the pruned index and the TokenVectorizer are used,
+    #            if the bundle has them
+    #========================================================================
+    def __init__(self, directory, mmap=True, pruned=False):
+        mmap_mode = "r" if mmap else None
+
+        with open(os.path.join(directory, "meta.json")) as f:
+            self.meta = json.load(f)
+
+        self.intercept = self.meta["intercept"]
+        self.positive_is_true = self.meta["positive_is_true"]
+
+        self.pruned = pruned and "index_long_norm_terms" in self.meta
+
+        if self.pruned:
+            norm_path = os.path.join(directory, "index_norm_terms.npy")
+            norm_terms = (np.load(norm_path, mmap_mode=mmap_mode) if os.path.exists(norm_path)
+                          else np.array([], dtype="S{}".format(TERM_WIDTH)))
+
+            self.coef = np.load(os.path.join(directory, "index_coef.npy"), mmap_mode=mmap_mode)
+            self.vectorizer = TokenVectorizer(
+                read_terms(os.path.join(directory, "index_terms.txt")),
+                norm_terms,
+                np.load(os.path.join(directory, "index_idf.npy"), mmap_mode=mmap_mode),
+                self.meta)
+            return
+
+        self.coef = np.load(os.path.join(directory, "coef.npy"), mmap_mode=mmap_mode)
+        self.vectorizer = BundleVectorizer(
+            np.load(os.path.join(directory, "terms.npy"), mmap_mode=mmap_mode),
+            np.load(os.path.join(directory, "columns.npy"), mmap_mode=mmap_mode),
+            np.load(os.path.join(directory, "idf.npy"), mmap_mode=mmap_mode),
+            self.meta)
+
+
+#========================================================================
+# This function converts the fitted vectorizer, model and label encoder
+# into a bundle.
+#
+# Input:
+#   vectorizer - the fitted TfidfVectorizer
+#   model - the fitted binary logistic regression model
+#   encoder - the label encoder of the model's classes
+#   directory - the bundle directory
+#   true_label - the class of the articles that are likely true
+#
+# Return:
+#   None
+#========================================================================
+def convert(vectorizer, model, encoder, directory, true_label="REAL"):
+    if (vectorizer.analyzer != "word" or vectorizer.tokenizer is not None
+            or vectorizer.preprocessor is not None or vectorizer.stop_words is not None
+            or vectorizer.strip_accents is not None
+            or tuple(vectorizer.ngram_range) != (1, 1)):
+        raise ValueError("Only word unigram vectorizers with the default "
+                         "preprocessing are supported")
+
+    if len(model.classes_) != 2:
+        raise ValueError("Only binary models are supported")
+
+    os.makedirs(directory, exist_ok=True)
+
+    # Sort the vocabulary by its UTF-8 encoding for the binary search,
+    # setting aside the terms too long for the vocabulary slots
+    vocabulary = vectorizer.vocabulary_
+    long_terms = {term: column for term, column in vocabulary.items()
+                  if len(term.encode("utf-8")) > TERM_WIDTH}
+    short_terms = sorted((term.encode("utf-8"), column) for term, column in vocabulary.items()
+                         if term not in long_terms)
+
+    idf = np.asarray(vectorizer.idf_, dtype=np.float64)
+    coef = np.asarray(model.coef_[0], dtype=np.float64)
+
+    np.save(os.path.join(directory, "terms.npy"),
+            np.array([term for term, _ in short_terms], dtype="S{}".format(TERM_WIDTH)))
+    np.save(os.path.join(directory, "columns.npy"),
+            np.array([column for _, column in short_terms], dtype=np.int32))
+    np.save(os.path.join(directory, "idf.npy"), idf)
+    np.save(os.path.join(directory, "coef.npy"), coef)
+
+    # Prune the vocabulary to the terms with a non-zero coefficient, setting
+    # the other terms aside in a sorted array if they count towards the norm
+    terms_by_column = [None] * len(vocabulary)
+    for term, column in vocabulary.items():
+        terms_by_column[column] = term
+
+    scoring = np.flatnonzero(coef != 0)
+    norm_terms = [] if vectorizer.norm is None else [
+        (term, column) for term, column in short_terms if coef[column] == 0]
+    long_norm_terms = [] if vectorizer.norm is None else sorted(
+        (term, column) for term, column in long_terms.items() if coef[column] == 0)
+
+    with open(os.path.join(directory, "index_terms.txt"), "w", encoding="utf-8") as f:
+        f.write("\n".join(terms_by_column[i] for i in scoring))
+
+    if vectorizer.norm is not None:
+        np.save(os.path.join(directory, "index_norm_terms.npy"),
+                np.array([term for term, _ in norm_terms], dtype="S{}".format(TERM_WIDTH)))
+
+    index = np.concatenate([scoring, [column for _, column in norm_terms],
+                            [column for _, column in long_norm_terms]]).astype(np.intp)
+    np.save(os.path.join(directory, "index_idf.npy"), idf[index])
+    np.save(os.path.join(directory, "index_coef.npy"), coef[scoring])
+
+    classes = encoder.inverse_transform(model.classes_)
+
+    meta = {
+        "intercept": float(model.intercept_[0]),
+        "positive_is_true": bool(classes[1] == true_label),
+        "token_pattern": vectorizer.token_pattern,
+        "lowercase": bool(vectorizer.lowercase),
+        "binary": bool(vectorizer.binary),
+        "sublinear_tf": bool(vectorizer.sublinear_tf),
+        "use_idf": bool(vectorizer.use_idf),
+        "norm": vectorizer.norm,
+        "long_terms": long_terms,
+        "index_long_norm_terms": {term: len(norm_terms) + i
+                                  for i, (term, _) in enumerate(long_norm_terms)},
+    }
+
+    with open(os.path.join(directory, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+
+
+if __name__ == "__main__":
+
+    import pickle
+
+    with open(scraping_config.vectorizer_file, "rb") as f:
+        vect = pickle.load(f)
+
+    with open(scraping_config.model_pickle_file, "rb") as f:
+        dl_model = pickle.load(f)
+
+    with open(scraping_config.encoder_file, "rb") as f:
+        enc = pickle.load(f)
+
+    convert(vect, dl_model, enc, scraping_config.model_bundle_dir)
+
+    print(f"Converted the pickles into {scraping_config.model_bundle_dir}")
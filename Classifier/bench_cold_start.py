@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+# =============================================================================
+# Cold-Start Benchmark
+#
+# This script compares loading the three pickles with loading the model
+# artifact bundle. Each load is timed in a fresh interpreter, from the first
+# import to the first prediction, so that the import of scikit-learn pulled
+# in by the pickles is counted. The predictions of both are checked to be the
+# same beforehand, with the full and the pruned index. The bundle is
+# converted from the pickles if it does not exist yet.
+#
+# Usage (from the Classifier folder):
+#   python bench_cold_start.py [number of runs]
+#
+# =============================================================================
+
+
+# Import the dependencies
+import json
+import os
+import pickle
+import statistics
+import subprocess
+import sys
+
+import numpy as np
+
+# Import the config file
+import scraping_config
+
+from artifacts import ModelBundle, convert
+from bench_normalizer import sample_articles
+from inference import LinearInference
+
+
+# The snippet loading the pickles in a fresh interpreter
+PICKLES = """
+import json, pickle, time
+start = time.perf_counter()
+import scraping_config
+from inference import LinearInference
+with open(scraping_config.model_pickle_file, "rb") as f: model = pickle.load(f)
+with open(scraping_config.vectorizer_file, "rb") as f: vect = pickle.load(f)
+with open(scraping_config.encoder_file, "rb") as f: enc = pickle.load(f)
+loaded = time.perf_counter()
+LinearInference.from_model(model, enc).predict(vect.transform(["sample article text"]))
+print(json.dumps([loaded - start, time.perf_counter() - start]))
+"""
+
+# The snippet loading the bundle in a fresh interpreter
+BUNDLE = """
+import json, time
+start = time.perf_counter()
+import scraping_config
+from artifacts import ModelBundle
+from inference import LinearInference
+bundle = ModelBundle(scraping_config.model_bundle_dir)
+loaded = time.perf_counter()
+LinearInference.from_bundle(bundle).predict(bundle.vectorizer.transform(["sample article text"]))
+print(json.dumps([loaded - start, time.perf_counter() - start]))
+"""
+
+
+#========================================================================
+# This function runs a snippet in a fresh interpreter.
+#
+# Input:
+#   snippet - the snippet printing its load and first prediction times
+#
+# Return:
+#   the load time and the time to the first prediction, in seconds
+#========================================================================
+def cold_start(snippet):
+    output = subprocess.run([sys.executable, "-c", snippet], check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+if __name__ == "__main__":
+
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    with open(scraping_config.model_pickle_file, "rb") as f:
+        dl_model = pickle.load(f)
+    with open(scraping_config.vectorizer_file, "rb") as f:
+        vect = pickle.load(f)
+    with open(scraping_config.encoder_file, "rb") as f:
+        enc = pickle.load(f)
+
+    if not os.path.isdir(scraping_config.model_bundle_dir):
+        convert(vect, dl_model, enc, scraping_config.model_bundle_dir)
+
+    # Parity check, of the full and pruned indexes, on a batch ending with
+    # empty rows
+    articles = [a.lower() for a in sample_articles(200)] + ["", "zzqx"]
+
+    outputs, proba = LinearInference.from_model(dl_model, enc).predict(vect.transform(articles))
+
+    for pruned in [False, True]:
+        bundle = ModelBundle(scraping_config.model_bundle_dir, pruned=pruned)
+        bundle_outputs, bundle_proba = LinearInference.from_bundle(bundle).predict(
+            bundle.vectorizer.transform(articles))
+
+        assert list(outputs) == list(bundle_outputs)
+        assert np.allclose(proba, bundle_proba)
+
+    for name, snippet in [("pickles", PICKLES), ("bundle", BUNDLE)]:
+        times = [cold_start(snippet) for _ in range(runs)]
+
+        print(f"{name:8s} load: {statistics.median(t[0] for t in times) * 1e3:8.1f} ms  "
+              f"first prediction: {statistics.median(t[1] for t in times) * 1e3:8.1f} ms")
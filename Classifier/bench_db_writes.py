@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+
+# =============================================================================
+# Prediction Write-back Benchmark
+#
+# This script measures the rate at which predictions are written back to a
+# scratch copy of the news_articles table, both one record per connection
+# and transaction, as update_record used to do, and in a single batched
+# transaction, as update_articles does.
+#
+# Usage (from the Classifier folder):
+#   python bench_db_writes.py [number of updates ...]
+#
+# =============================================================================
+
+
+# Import the dependencies
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+# Import the config file
+import scraping_config
+
+from classify import Classifier
+
+
+#========================================================================
+# This function creates a scratch database holding the given number of
+# unclassified articles.
+#
+# Input:
+#   path - the path of the scratch database
+#   count - the number of articles
+#
+# Return:
+#   None
+#========================================================================
+def create_db(path, count):
+    if os.path.exists(path):
+        os.remove(path)
+
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute("CREATE TABLE news_articles (pk INTEGER PRIMARY KEY, "
+                     "title TEXT, article TEXT, TrueOrFalse TEXT, TrueProbability REAL)")
+        conn.executemany("INSERT INTO news_articles (title, article) VALUES (?, ?)",
+                         (("title", "article") for _ in range(count)))
+    conn.close()
+
+
+#========================================================================
+# This function writes the predictions one record per connection and
+# transaction, through plain connections with the default pragmas, as
+# update_record used to do.
+#
+# Input:
+#   path - the path of the database
+#   df - the dataframe of predictions
+#
+# Return:
+#   None
+#========================================================================
+def update_per_record(path, df):
+    for pk, label, probability in zip(df["pk"].tolist(), df["TrueOrFalse"].tolist(),
+                                      df["Probability"].tolist()):
+        conn = sqlite3.connect(path)
+        conn.execute(scraping_config.db_update_query, (label, probability, pk))
+        conn.commit()
+        conn.close()
+
+
+if __name__ == "__main__":
+
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]
+
+    scraping_config.db_file = os.path.join(tempfile.mkdtemp(), "bench.sqlite")
+
+    # The models are only loaded on first use, which the write-back methods
+    # do not make
+    classifier = Classifier()
+
+    for count in sizes:
+        df = pd.DataFrame({"pk": range(1, count + 1),
+                           "TrueOrFalse": ["Likely True", "Likely False"] * (count // 2)
+                                          + ["Likely True"] * (count % 2),
+                           "Probability": 0.5})
+
+        create_db(scraping_config.db_file, count)
+        start = time.perf_counter()
+        update_per_record(scraping_config.db_file, df)
+        per_record = count / (time.perf_counter() - start)
+
+        create_db(scraping_config.db_file, count)
+        classifier.schema_ready = False
+        classifier.df = df
+        start = time.perf_counter()
+        classifier.update_articles()
+        batched = count / (time.perf_counter() - start)
+
+        print(f"updates: {count:7d}  per record: {per_record:10.0f} rows/s  "
+              f"batched: {batched:10.0f} rows/s")
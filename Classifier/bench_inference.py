@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+# =============================================================================
+# Inference Benchmark
+#
+# This script compares the predictions of the LinearInference engine with
+# those of the model's predict method followed by the label encoder and the
+# list comprehension that make_predictions used to perform, then times both
+# at various batch sizes. The model is given the vectors of the pickled
+# TfidfVectorizer it was trained with, and the engine those of the
+# Classifier's vectorizer, which may be the pruned index of the bundle.
+#
+# Usage (from the Classifier folder):
+#   python bench_inference.py [batch size ...]
+#
+# =============================================================================
+
+
+# Import the dependencies
+import pickle
+import sys
+import timeit
+
+import numpy as np
+import scipy.sparse
+
+# Import the config file
+import scraping_config
+
+from bench_normalizer import sample_articles
+from classify import Classifier
+
+
+#========================================================================
+# This function stacks copies of the vectors up to the specified number of
+# rows.
+#
+# Input:
+#   vectors - the CSR matrix of vectors
+#   size - the number of rows
+#
+# Return:
+#   the CSR matrix of the size rows
+#========================================================================
+def tile(vectors, size):
+    return scipy.sparse.vstack([vectors] * (size // vectors.shape[0] + 1),
+                               format="csr")[:size]
+
+
+#========================================================================
+# This function classifies the TF-IDF vectors the way make_predictions used
+# to.
+#
+# Input:
+#   classifier - the Classifier holding the model and the label encoder
+#   X - the CSR matrix of TF-IDF vectors
+#
+# Return:
+#   the list of "Likely True" / "Likely False" outputs
+#========================================================================
+def sklearn_predict(classifier, X):
+    true_or_false = classifier.enc.inverse_transform(classifier.dl_model.predict(X))
+    return ["Likely True" if x == "REAL" else "Likely False" for x in true_or_false]
+
+
+if __name__ == "__main__":
+
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1, 10, 100, 1000, 10000]
+
+    classifier = Classifier()
+
+    articles = [classifier.lemmatize(classifier.remove_stopwords(a.lower()))
+                for a in sample_articles(100)]
+
+    # The model expects the columns of the pickled vectorizer, whatever
+    # vectorizer the Classifier uses
+    with open(scraping_config.vectorizer_file, "rb") as f:
+        tfidf = pickle.load(f)
+
+    model_vectors = tfidf.transform(articles)
+    engine_vectors = classifier.vect.transform(articles)
+
+    for size in sizes:
+        X = tile(model_vectors, size)
+        X_engine = tile(engine_vectors, size)
+
+        # Parity check
+        outputs, proba = classifier.inference.predict(X_engine)
+        assert list(outputs) == sklearn_predict(classifier, X)
+        assert np.allclose(proba, classifier.dl_model.predict_proba(X)[:, 1])
+
+        runs = max(1, 10000 // size)
+        before = timeit.timeit(lambda: sklearn_predict(classifier, X), number=runs) / runs
+        after = timeit.timeit(lambda: classifier.inference.predict(X_engine),
+                              number=runs) / runs
+
+        print(f"batch: {size:6d}  sklearn: {before * 1e6 / size:8.2f} us/article  "
+              f"engine: {after * 1e6 / size:8.2f} us/article  "
+              f"speedup: {before / after:.1f}x")
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+# =============================================================================
+# Normalizer Benchmark
+#
+# This script compares the chained cleaning methods of the Classifier with
+# the single-pass TextNormalizer. It first checks that both produce the same
+# text for every sample article, then times each of them.
+#
+# Usage (from the Classifier folder):
+#   python bench_normalizer.py [number of articles]
+#
+# =============================================================================
+
+
+# Import the dependencies
+import json
+import sys
+import timeit
+
+from classify import Classifier
+from normalizer import TextNormalizer
+
+
+#========================================================================
+# This function builds the sample articles from the titles and descriptions
+# of the article snippets retrieved by the scraper.
+#
+# Input:
+#   count - the number of articles to build
+#
+# Return:
+#   the list of sample articles
+#========================================================================
+def sample_articles(count):
+    with open("../API Scraper/mediastack.txt") as f:
+        snippets = json.loads(f.readline())["data"]
+
+    paragraphs = [" ".join([s["title"], s["description"] or ""]) for s in snippets]
+
+    # Each article is made of 20 consecutive snippets
+    return [" ".join(paragraphs[(i + j) % len(paragraphs)] for j in range(20))
+            for i in range(count)]
+
+
+#========================================================================
+# This function applies the chained cleaning methods of the Classifier to
+# the text, as clean_articles did before the TextNormalizer.
+#
+# Input:
+#   classifier - the Classifier whose cleaning methods are to be applied
+#   text - the text to be cleaned
+#
+# Return:
+#   the cleaned text
+#========================================================================
+def chained(classifier, text):
+    text = classifier.to_lower(text)
+    text = classifier.add_spaces(text)
+    text = classifier.remove_numbers(text)
+    text = classifier.remove_punctuation(text)
+    return classifier.remove_stopwords(text)
+
+
+if __name__ == "__main__":
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    articles = sample_articles(count)
+
+    # The cleaning methods do not need the models loaded by the constructor
+    classifier = Classifier.__new__(Classifier)
+    normalizer = TextNormalizer(classifier.stop_words())
+
+    # Parity check
+    for article in articles:
+        assert chained(classifier, article) == normalizer.normalize(article)
+
+    before = timeit.timeit(lambda: [chained(classifier, a) for a in articles], number=1)
+    after = timeit.timeit(lambda: [normalizer.normalize(a) for a in articles], number=5) / 5
+
+    print(f"articles:   {count}")
+    print(f"chained:    {before * 1000 / count:.3f} ms/article")
+    print(f"normalizer: {after * 1000 / count:.3f} ms/article")
+    print(f"speedup:    {before / after:.1f}x")
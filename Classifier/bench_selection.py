@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+# =============================================================================
+# Selection Benchmark
+#
+# This script measures the time taken to select the unclassified articles
+# of a scratch news_articles table as the table grows, the newest 1% of the
+# articles being unclassified. The selection is timed without an index, as
+# it used to be, and with the partial index of the unclassified articles
+# created by the Classifier, both in one query and in keyset chunks.
+#
+# Usage (from the Classifier folder):
+#   python bench_selection.py [number of articles ...]
+#
+# =============================================================================
+
+
+# Import the dependencies
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+# Import the config file
+import scraping_config
+
+from classify import Classifier
+
+
+#========================================================================
+# This function creates a scratch database holding the given number of
+# articles, the newest 1% of which are unclassified.
+#
+# Input:
+#   path - the path of the scratch database
+#   count - the number of articles
+#
+# Return:
+#   None
+#========================================================================
+def create_db(path, count):
+    if os.path.exists(path):
+        os.remove(path)
+
+    classified = count - max(1, count // 100)
+    text = "article text " * 200
+
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute("CREATE TABLE news_articles (pk INTEGER PRIMARY KEY, "
+                     "title TEXT, article TEXT, TrueOrFalse TEXT, TrueProbability REAL)")
+        conn.executemany("INSERT INTO news_articles (title, article, TrueOrFalse) "
+                         "VALUES (?, ?, ?)",
+                         (("title", text, "Likely True" if i < classified else None)
+                          for i in range(count)))
+    conn.close()
+
+
+#========================================================================
+# This function times the selection of the unclassified articles.
+#
+# Input:
+#   classifier - the Classifier whose retrieval methods are used
+#   chunked - whether the articles are selected in keyset chunks
+#
+# Return:
+#   the number of articles selected and the time taken, in seconds
+#========================================================================
+def time_selection(classifier, chunked):
+    start = time.perf_counter()
+
+    if chunked:
+        selected = sum(len(rows) for rows in classifier.iter_article_chunks())
+    else:
+        classifier.get_articles()
+        selected = len(classifier.raw_article_list)
+
+    return selected, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000, 1000000]
+
+    scraping_config.db_file = os.path.join(tempfile.mkdtemp(), "bench.sqlite")
+    classifier = Classifier()
+
+    for count in sizes:
+        create_db(scraping_config.db_file, count)
+
+        # Without the partial index: the schema is not checked
+        classifier.schema_ready = True
+        selected, full_scan = time_selection(classifier, chunked=False)
+
+        classifier.schema_ready = False
+        classifier.get_db_connection().close()
+        _, indexed = time_selection(classifier, chunked=False)
+        _, keyset = time_selection(classifier, chunked=True)
+
+        print(f"articles: {count:8d}  unclassified: {selected:6d}  "
+              f"full scan: {full_scan * 1e3:8.1f} ms  "
+              f"partial index: {indexed * 1e3:8.1f} ms  "
+              f"keyset chunks: {keyset * 1e3:8.1f} ms")
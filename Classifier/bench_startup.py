@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+# =============================================================================
+# Startup Benchmark
+#
+# This script times, in fresh interpreters, the import of the classify
+# module, the construction of a Classifier, and the first use of the spacy
+# pipeline and of the model artifacts, which are loaded lazily. It then lists
+# the slowest imports of the classify module, as reported by python's
+# -X importtime option.
+#
+# Usage (from the Classifier folder):
+#   python bench_startup.py [number of runs] [number of imports listed]
+#
+# =============================================================================
+
+
+# Import the dependencies
+import json
+import statistics
+import subprocess
+import sys
+
+
+# The snippet timing the startup phases in a fresh interpreter
+STARTUP = """
+import json, time
+start = time.perf_counter()
+import classify
+imported = time.perf_counter()
+classifier = classify.Classifier()
+constructed = time.perf_counter()
+classifier.inference, classifier.vect
+models = time.perf_counter()
+classifier.nlp
+nlp = time.perf_counter()
+print(json.dumps({"import": imported - start, "construct": constructed - imported,
+                  "models": models - constructed, "nlp": nlp - models}))
+"""
+
+
+#========================================================================
+# This function times the startup phases in a fresh interpreter.
+#
+# Input:
+#   None
+#
+# Return:
+#   the dictionary of the time of each phase, in seconds
+#========================================================================
+def startup():
+    output = subprocess.run([sys.executable, "-c", STARTUP], check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+#========================================================================
+# This function returns the slowest imports of the classify module.
+#
+# Input:
+#   count - the number of imports returned
+#
+# Return:
+#   the list of (cumulative microseconds, module) of the slowest imports
+#========================================================================
+def slowest_imports(count):
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", "import classify"],
+                            check=True, capture_output=True, text=True).stderr
+
+    # Lines read "import time: self [us] | cumulative | imported package"
+    imports = []
+    for line in stderr.splitlines():
+        fields = line.split("|")
+        if len(fields) == 3 and fields[1].strip().isdigit():
+            imports.append((int(fields[1]), fields[2].rstrip()))
+
+    return sorted(imports, reverse=True)[:count]
+
+
+if __name__ == "__main__":
+
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+
+    times = [startup() for _ in range(runs)]
+
+    for phase in ["import", "construct", "models", "nlp"]:
+        print(f"{phase:10s} {statistics.median(t[phase] for t in times) * 1e3:8.1f} ms")
+
+    print("\nslowest imports of classify (cumulative):")
+    for cumulative, module in slowest_imports(count):
+        print(f"{cumulative / 1e3:8.1f} ms {module}")
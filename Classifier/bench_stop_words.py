@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+# =============================================================================
+# Stop Words Benchmark
+#
+# This script compares the per-article cost of removing the stopwords when
+# the set of stopwords is rebuilt for every word, as remove_stopwords used to
+# do, with the cost when the shared frozenset is used.
+#
+# Usage (from the Classifier folder):
+#   python bench_stop_words.py [number of articles]
+#
+# =============================================================================
+
+
+# Import the dependencies
+import sys
+import timeit
+
+from nltk.corpus import stopwords
+
+# Import the config file
+import scraping_config
+
+from bench_normalizer import sample_articles
+from stop_words import load_stop_words
+
+
+#========================================================================
+# This function rebuilds the set of stopwords from the NLTK corpus and the
+# customized stopwords file.
+#
+# Input:
+#   None
+#
+# Return:
+#   the set of stopwords
+#========================================================================
+def rebuilt_stop_words():
+    sw1 = stopwords.words("english")
+    sw2 = open(scraping_config.stop_words_file).read().splitlines()
+    return set(sw1 + sw2)
+
+
+if __name__ == "__main__":
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    articles = [a.lower() for a in sample_articles(count)]
+
+    stop_words = load_stop_words()
+
+    before = timeit.timeit(
+        lambda: [" ".join(w for w in a.split() if w not in rebuilt_stop_words())
+                 for a in articles],
+        number=1)
+    after = timeit.timeit(
+        lambda: [" ".join(w for w in a.split() if w not in stop_words)
+                 for a in articles],
+        number=100) / 100
+
+    print(f"articles:       {count}")
+    print(f"rebuilt set:    {before * 1000 / count:.3f} ms/article")
+    print(f"shared set:     {after * 1000 / count:.3f} ms/article")
+    print(f"speedup:        {before / after:.0f}x")
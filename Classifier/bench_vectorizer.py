@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+# =============================================================================
+# Vectorizer Benchmark
+#
+# This script compares the pickled TfidfVectorizer, which re-tokenizes the
+# lemmatized text, with the TokenVectorizer of the pruned index, which maps
+# the lemmas of the cleaning stage straight to feature columns. The
+# predictions of both are checked to be the same, then their transform times
+# and the sizes of their vocabularies are reported. The model artifact
+# bundle is converted from the pickles if it does not exist yet.
+#
+# Usage (from the Classifier folder):
+#   python bench_vectorizer.py [number of articles]
+#
+# =============================================================================
+
+
+# Import the dependencies
+import os
+import pickle
+import sys
+import timeit
+
+import numpy as np
+
+# Import the config file
+import scraping_config
+
+from artifacts import ModelBundle, convert
+from bench_normalizer import sample_articles
+from classify import Classifier
+from inference import LinearInference
+from normalizer import TextNormalizer
+
+
+#========================================================================
+# This function returns the approximate size of a vocabulary dictionary.
+#
+# Input:
+#   vocabulary - the dictionary mapping the terms to their columns
+#
+# Return:
+#   the size in bytes of the dictionary, its keys and its values
+#========================================================================
+def vocabulary_size(vocabulary):
+    return sys.getsizeof(vocabulary) + sum(sys.getsizeof(term) + sys.getsizeof(column)
+                                           for term, column in vocabulary.items())
+
+
+if __name__ == "__main__":
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+    classifier = Classifier()
+
+    if not os.path.isdir(scraping_config.model_bundle_dir):
+        convert(classifier.vect, classifier.dl_model, classifier.enc,
+                scraping_config.model_bundle_dir)
+
+    with open(scraping_config.vectorizer_file, "rb") as f:
+        vect = pickle.load(f)
+
+    bundle = ModelBundle(scraping_config.model_bundle_dir, pruned=True)
+    pruned = bundle.vectorizer
+
+    normalizer = TextNormalizer(classifier.stop_words())
+    tokens = classifier.lemmatize_tokens(normalizer.normalize(a)
+                                         for a in sample_articles(count))
+    texts = [" ".join(t) for t in tokens]
+
+    # Parity check
+    outputs, proba = LinearInference.from_model(classifier.dl_model, classifier.enc) \
+        .predict(vect.transform(texts))
+    pruned_outputs, pruned_proba = LinearInference.from_bundle(bundle) \
+        .predict(pruned.transform_tokens(tokens))
+
+    assert list(outputs) == list(pruned_outputs)
+    assert np.allclose(proba, pruned_proba)
+
+    before = min(timeit.repeat(lambda: vect.transform(texts), number=1, repeat=5))
+    after = min(timeit.repeat(lambda: pruned.transform_tokens(tokens), number=1, repeat=5))
+
+    print(f"pickled vectorizer: {before * 1e6 / count:8.2f} us/article  "
+          f"{len(vect.vocabulary_):7d} terms  "
+          f"{vocabulary_size(vect.vocabulary_) / 2**20:6.1f} MB")
+    print(f"pruned index:       {after * 1e6 / count:8.2f} us/article  "
+          f"{pruned.n_scoring:7d} scoring of {len(pruned.idf)} terms  "
+          f"{vocabulary_size(pruned.index) / 2**20:6.1f} MB")
+    print(f"speedup: {before / after:.1f}x")
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+
+# =============================================================================
+# Parallel Classification Benchmark
+#
+# This script times the cleaning and classification of a set of sample
+# articles with 1, 2, 4 and as many worker processes as there are cores.
+# The database is not read or written.
+#
+# Usage (from the Classifier folder):
+#   python bench_workers.py [number of articles]
+#
+# =============================================================================
+
+
+# Import the dependencies
+import os
+import sys
+import time
+
+from bench_normalizer import sample_articles
+from classify import Classifier
+
+
+if __name__ == "__main__":
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rows = [(pk, "", text) for pk, text in enumerate(sample_articles(count))]
+
+    classifier = Classifier()
+
+    baseline = None
+    for workers in sorted({1, 2, 4, os.cpu_count()}):
+        start = time.perf_counter()
+        classifier.classify_rows(rows, workers)
+        elapsed = time.perf_counter() - start
+
+        baseline = baseline or elapsed
+        print(f"workers: {workers:3d}  {count / elapsed:8.1f} articles/s  "
+              f"speedup: {baseline / elapsed:.2f}x")
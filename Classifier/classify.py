@@ -12,59 +12,213 @@
 
 
 # Import the dependencies
+import argparse
+import contextlib
+import hashlib
+import os
 import sqlite3
 import logging
 import re
 import string
-import pandas as pd
-from nltk.corpus import stopwords
+import time
 
-import spacy
 import pickle
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import cached_property
 
 # Import the config file
 import scraping_config
 
+# Import the stage timers and counters
+from instrumentation import Metrics, profiled
+
+# Import the single-pass text normalizer
+from normalizer import TextNormalizer
+
+# Import the shared set of stopwords
+from stop_words import load_stop_words
+
+# pandas, spacy, numpy and the model artifacts are imported and loaded on
+# first use, so that a run with nothing to classify does not pay for them
+
 
 # Class Classifier 
 class Classifier:
     
     #========================================================================
-    # Class constructor
+    # Class constructor. The spacy pipeline and the model artifacts are not
+    # loaded here but on first use, by the accessors below.
     #========================================================================
     def __init__(self):
         # Initialize logging    
         self.logger = logging.getLogger(scraping_config.log_file)
-        self.logger.setLevel(logging.DEBUG)
+        self.logger.setLevel(scraping_config.log_level)
         
-        # create file handler which logs even debug messages
-        fh = logging.FileHandler(scraping_config.log_file)
-        fh.setLevel(logging.DEBUG)
-
-        # create formatter and add it to the handlers
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        fh.setFormatter(formatter)
+        # The logger is shared by all the Classifier instances of the process,
+        # so that the file handler is only added once
+        if not self.logger.handlers:
+            # create file handler which logs even debug messages. The log 
+            # file is only opened when the first record is emitted.
+            fh = logging.FileHandler(scraping_config.log_file, delay=True)
+            fh.setLevel(logging.DEBUG)
+    
+            # create formatter and add it to the handlers
+            formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+            fh.setFormatter(formatter)
+            
+            # add the handlers to logger
+            self.logger.addHandler(fh)
+        
+        # Number of processes used by spacy to lemmatize the articles
+        self.n_process = scraping_config.lemmatize_n_process
+        
+        # Whether all the articles are classified again, rather than only 
+        # the unclassified ones
+        self.reclassify = False
         
-        # add the handlers to logger
-        self.logger.addHandler(fh)
+        # Whether the schema has been checked by this Classifier
+        self.schema_ready = False
+        
+        # The stage timers and counters of the run
+        self.metrics = Metrics("classifier")
+    
+    
+    #========================================================================
+    # The spacy nlp pipeline, loaded on first use. The components that 
+    # lemmatization does not use (the parser and the named entity 
+    # recognizer) are not loaded.
+    #========================================================================
+    @cached_property
+    def nlp(self):
+        import spacy
+        
+        return spacy.load(scraping_config.spacy_model,
+                          exclude=scraping_config.spacy_exclude)
+    
+    
+    #========================================================================
+    # The model artifact bundle, loaded on first use, or None if it has not
+    # been converted from the pickles by artifacts.py. Its arrays are
+    # memory-mapped, so that loading it is almost free and the worker
+    # processes share their pages.
+    #========================================================================
+    @cached_property
+    def bundle(self):
+        if not os.path.isdir(scraping_config.model_bundle_dir):
+            return None
         
-        # Initialize spacy nlp library 
-        self.nlp = spacy.load("en_core_web_sm")
+        from artifacts import ModelBundle
         
-        # Load the DL model that was created from the training that was
-        # carried out in the Jupyter Notebook
+        return ModelBundle(scraping_config.model_bundle_dir,
+                           pruned=scraping_config.vectorizer_pruned_index)
+    
+    
+    #========================================================================
+    # The DL model that was created from the training that was carried out
+    # in the Jupyter Notebook, loaded on first use.
+    #========================================================================
+    @cached_property
+    def dl_model(self):
         with open(scraping_config.model_pickle_file,"rb") as f:
-            self.dl_model = pickle.load(f)
+            return pickle.load(f)
+    
+    
+    #========================================================================
+    # The label encoder that was created from the training that was carried
+    # out in the Jupyter Notebook, loaded on first use.
+    #========================================================================
+    @cached_property
+    def enc(self):
+        with open(scraping_config.encoder_file,"rb") as f:
+            return pickle.load(f)
+    
+    
+    #========================================================================
+    # The vectorizer, loaded on first use: that of the model artifact bundle
+    # if there is one, or else the vectorizer object that was created from 
+    # the training that was carried out in the Jupyter Notebook.
+    #========================================================================
+    @cached_property
+    def vect(self):
+        if self.bundle is not None:
+            return self.bundle.vectorizer
         
-        # Load the vectorizer object that was created from the training that was
-        # carried out in the Jupyter Notebook        
         with open(scraping_config.vectorizer_file,"rb") as f:
-            self.vect = pickle.load(f)
+            return pickle.load(f)
+    
+    
+    #========================================================================
+    # The inference engine, initialized on first use from the coefficients
+    # of the model artifact bundle if there is one, or else of the model.
+    #========================================================================
+    @cached_property
+    def inference(self):
+        from inference import LinearInference
         
-        # Load the label encoder that was created from the training that was
-        # carried out in the Jupyter Notebook    
-        with open(scraping_config.encoder_file,"rb") as f:
-            self.enc = pickle.load(f)    
+        if self.bundle is not None:
+            return LinearInference.from_bundle(self.bundle)
+        
+        return LinearInference.from_model(self.dl_model, self.enc)
+    
+    
+    #========================================================================
+    # The fingerprint of the model artifacts: a hash of the pickles, of the
+    # model artifact bundle, of the stopwords file and of the settings that
+    # the predictions depend on.
+    #========================================================================
+    @cached_property
+    def model_fingerprint(self):
+        paths = [scraping_config.model_pickle_file, scraping_config.vectorizer_file,
+                 scraping_config.encoder_file, scraping_config.stop_words_file]
+        
+        bundle_dir = scraping_config.model_bundle_dir
+        if os.path.isdir(bundle_dir):
+            paths += [os.path.join(bundle_dir, name) for name in sorted(os.listdir(bundle_dir))]
+        
+        digest = hashlib.sha256()
+        for path in paths:
+            if os.path.isfile(path):
+                with open(path, "rb") as f:
+                    for block in iter(lambda: f.read(2**20), b""):
+                        digest.update(block)
+        
+        digest.update(repr((scraping_config.spacy_model, scraping_config.prediction_threshold,
+                            scraping_config.vectorizer_pruned_index)).encode("utf-8"))
+        
+        return digest.hexdigest()
+    
+    
+    #========================================================================
+    # The prediction cache, opened on first use, or None if it is disabled
+    # in the config file.
+    #========================================================================
+    @cached_property
+    def prediction_cache(self):
+        if not scraping_config.prediction_cache_file:
+            return None
+        
+        from prediction_cache import PredictionCache
+        
+        return PredictionCache(scraping_config.prediction_cache_file,
+                               self.model_fingerprint,
+                               scraping_config.prediction_cache_max_entries)
+    
+    
+    #========================================================================
+    # This method loads the spacy pipeline and the model artifacts, so that
+    # the first classification does not pay for them.
+    #
+    # Input:
+    #   None
+    #
+    # Return:
+    #   None
+    #========================================================================
+    def warm_up(self):
+        self.nlp
+        self.vect
+        self.inference
     
     
     #========================================================================
@@ -79,11 +233,7 @@ class Classifier:
     #   ls - filtered list of article snippers
     #========================================================================
     def language(self,ls,lang=''):
-        for i,article in enumerate(ls):
-            if article['language'] != lang:
-               ls.pop(i)
-        
-        return ls
+        return [article for article in ls if article.get('language') == lang]
         
            
     #========================================================================
@@ -164,17 +314,16 @@ class Classifier:
 
     
     # ========================================================================
-    # This method returns a list of customized stopwords from the text
+    # This method returns the set of customized stopwords. The set is loaded
+    # once per process and shared by all the callers.
     #
     # Input:
     #     None
     # Return:
-    #     the list of stopwords
+    #     the frozenset of stopwords
     # ========================================================================
     def stop_words(self):
-        sw1 = stopwords.words("english")
-        sw2 = open("../nlp/stop_words_english.txt").read().splitlines()
-        return set(sw1 + sw2)
+        return load_stop_words()
 
 
     # ========================================================================
@@ -185,7 +334,8 @@ class Classifier:
     #     the text with the stopwords removed
     # ========================================================================
     def remove_stopwords(self,text):
-        return " ".join(word for word in text.split() if word not in self.stop_words())
+        stop_words = self.stop_words()
+        return " ".join(word for word in text.split() if word not in stop_words)
     
     
     # ========================================================================
@@ -199,10 +349,44 @@ class Classifier:
     def lemmatize(self,text):
         return " ".join(set([token.lemma_ for token in self.nlp(text)]))
 
+
+    # ========================================================================
+    # This method lemmatizes a sequence of texts into lists of distinct 
+    # lemmas. The texts are streamed through the spacy pipeline in batches,
+    # optionally spread across several processes, instead of being run 
+    # through the pipeline one at a time.
+    #
+    # Input:
+    #     texts - the iterable of texts to be lemmatized
+    # Return:
+    #     the list of lists of lemmas, in the order of the input texts
+    # ========================================================================    
+    def lemmatize_tokens(self,texts):
+        docs = self.nlp.pipe(texts,
+                             batch_size=scraping_config.lemmatize_batch_size,
+                             n_process=self.n_process)
+        
+        return [list(set([token.lemma_ for token in doc])) for doc in docs]
+
+
+    # ========================================================================
+    # This method lemmatizes a sequence of texts.
+    #
+    # Input:
+    #     texts - the iterable of texts to be lemmatized
+    # Return:
+    #     the list of lemmatized texts, in the order of the input texts
+    # ========================================================================    
+    def lemmatize_texts(self,texts):
+        return [" ".join(tokens) for tokens in self.lemmatize_tokens(texts)]
+
     
     # ========================================================================
-    # This method cleans the articles text by calling the above cleaning 
-    # methods.
+    # This method cleans the articles text. The lowercasing, sentence spacing,
+    # numeric token removal, punctuation stripping and stopword filtering are
+    # carried out in a single pass by the TextNormalizer, and produce the same
+    # text as chaining the above cleaning methods. The lemmas of each 
+    # article are kept in the tokens column, for the vectorizer.
     #
     # Input:
     #     None
@@ -210,21 +394,27 @@ class Classifier:
     #     None
     # ========================================================================  
     def clean_articles(self):
-             
+        import pandas as pd
+        
         self.df = pd.DataFrame(self.article_list)
         
-        self.df["text"] = self.df["text"].apply(lambda x: self.to_lower(x))
-        self.df["text"] = self.df["text"].apply(lambda x: self.add_spaces(x))
+        normalizer = TextNormalizer(self.stop_words())
+        
+        self.metrics.count("bytes_cleaned", int(self.df["text"].str.len().sum()))
         
-        self.df["text"] = self.df["text"].apply(lambda x: self.remove_numbers(x))
-        self.df["text"] = self.df["text"].apply(lambda x: self.remove_punctuation(x))
-        self.df["text"] = self.df["text"].apply(lambda x: self.remove_stopwords(x))
-        self.df["text"] = self.df["text"].apply(lambda x: self.lemmatize(x))
+        with self.metrics.stage("clean.normalize", items=len(self.df)):
+            self.df["text"] = self.df["text"].apply(normalizer.normalize)
+        
+        with self.metrics.stage("clean.lemmatize", items=len(self.df)):
+            self.df["tokens"] = self.lemmatize_tokens(self.df["text"])
         
  
     # ========================================================================
     # This method predicts whether the articles are likely true or likely false
-    # and updates the TrueOrFalse column of the dataframe.
+    # and updates the TrueOrFalse column of the dataframe, together with the
+    # Probability column holding the probability that the article is true.
+    # An article is likely true when that probability is above the threshold
+    # specified in the config file.
     # 
     # Input:
     #     None
@@ -232,13 +422,21 @@ class Classifier:
     #     None
     # ========================================================================        
     def make_predictions(self):
-        X = self.vect.transform(self.df["text"])
-        
-        true_or_false = self.enc.inverse_transform(self.dl_model.predict(X))
-        self.df["TrueOrFalse"] = ["Likely True" if x == "REAL" \
-                                  else "Likely False" for x in true_or_false]
+        # The TokenVectorizer of the pruned index takes the lemmas as they
+        # are, other vectorizers take them joined into a text
+        vect = self.vect
+        with self.metrics.stage("vectorize", items=len(self.df)):
+            if hasattr(vect, "transform_tokens"):
+                X = vect.transform_tokens(self.df["tokens"])
+            else:
+                X = vect.transform(self.df["tokens"].map(" ".join))
         
-        # self.logger.debug("self.df['TrueOrFalse'] = {}".format(self.df["TrueOrFalse"]))
+        inference = self.inference
+        with self.metrics.stage("predict", items=len(self.df)):
+            true_or_false, probability = inference.predict(
+                X, threshold=scraping_config.prediction_threshold)
+        self.df["TrueOrFalse"] = true_or_false
+        self.df["Probability"] = probability
         
     #========================================================================
     # This method retrieves the article snippets from the api-specific
@@ -258,8 +456,6 @@ class Classifier:
         # Initialize the article_list instance list variable
         self.article_list = []
         
-        self.logger.debug("Process articles")
-        
         # For each article ...
         for article in self.raw_article_list:
             self.article_list.append(
@@ -272,7 +468,8 @@ class Classifier:
 
 
     #========================================================================
-    # This method returns the connection to the sqlite database
+    # This method returns the connection to the sqlite database, with the 
+    # journal mode and synchronous setting specified in the config file.
     #
     # Input:
     #   None
@@ -281,7 +478,19 @@ class Classifier:
     #   None
     #========================================================================
     def get_db_connection(self):
-        return sqlite3.connect(scraping_config.db_file)
+        conn = sqlite3.connect(scraping_config.db_file)
+        
+        if scraping_config.db_journal_mode:
+            conn.execute(f"PRAGMA journal_mode={scraping_config.db_journal_mode}")
+        
+        if scraping_config.db_synchronous:
+            conn.execute(f"PRAGMA synchronous={scraping_config.db_synchronous}")
+        
+        if not self.schema_ready:
+            self.ensure_schema(conn)
+            self.schema_ready = True
+        
+        return conn
 
 
     #========================================================================
@@ -295,38 +504,37 @@ class Classifier:
     #========================================================================
     def get_articles(self):
         
-        self.logger.debug("Retrieving articles .....")
+        # No articles are classified if they cannot be retrieved
+        self.raw_article_list = []
         
         try:
             
-            self.logger.debug("DB Connection")
             # Get a database connection
             conn = self.get_db_connection()
             
-            self.logger.debug("DB Cursor")
             # Get a cursor from the connection
             cursor = conn.cursor()
             
-            self.logger.debug("SQL")
-            # Insert the contents of the article_list instance list variable
-            # into the database table specified in the config file
-            sql = scraping_config.db_retrieval_query
+            # Retrieve the unclassified articles, or all the articles when
+            # reclassifying
+            sql = (scraping_config.db_reclassify_query if self.reclassify
+                   else scraping_config.db_retrieval_query)
             
-            self.logger.debug(sql)
+            start = time.perf_counter()
             cursor.execute(sql)
-            
-            self.logger.debug("fetchall")
             self.raw_article_list = cursor.fetchall()
             
-            self.logger.debug(f"raw_article_list: {len(self.raw_article_list)}")
+            self.metrics.record("read", time.perf_counter() - start,
+                                len(self.raw_article_list))
+            self.metrics.count("articles_read", len(self.raw_article_list))
+            self.logger.debug("Retrieved %d articles", len(self.raw_article_list))
+            
             # Close the cursor
             cursor.close()
             
             # Commit the transaction
             conn.commit()
             
-            self.logger.debug("Retrieved articles ...")
-            
             conn.close()
                         
         except Exception as e:
@@ -334,65 +542,322 @@ class Classifier:
  
     
     #========================================================================
-    # This method updates the "TrueOrFalse" column of the sqlite database with 
-    # "likely true" or "likely false."
+    # This method retrieves the unclassified articles (or all the articles
+    # when reclassifying) from the sqlite database in chunks of the size 
+    # specified in the config file. The chunks are
+    # paginated on the primary key, and a new connection is used for each 
+    # chunk so that no read transaction is held open while the predictions
+    # of the previous chunk are written.
     #
     # Input:
     #   None
     #
     # Return:
-    #   None
-    #======================================================================== 
-    def update_record(self,x):
-        self.logger.debug("Updating DB record ... {}".format(x["pk"]))
-        # self.logger.debug("x[\"TrueOrFalse\"] = {}".format(x['TrueOrFalse']))
+    #   a generator of lists of (pk, title, article) rows
+    #========================================================================
+    def iter_article_chunks(self):
         
-        try:
-            self.logger.debug("Getting db connection ...")
+        chunk_size = scraping_config.classifier_chunk_size
+        last_pk = -2**63
+        
+        sql = (scraping_config.db_reclassify_chunk_query if self.reclassify
+               else scraping_config.db_retrieval_chunk_query)
+        
+        while True:
+            start = time.perf_counter()
             
-            # Get a database connection
-            conn = self.get_db_connection()
+            try:
+                conn = self.get_db_connection()
+                cursor = conn.cursor()
+                cursor.execute(sql, (last_pk, chunk_size))
+                rows = cursor.fetchall()
+                cursor.close()
+                conn.close()
             
-            # Get a cursor from the connection
-            cursor = conn.cursor()
+            except Exception as e:
+                self.logger.fatal(f"Error retrieving articles from database: {e}")
+                return
             
+            self.metrics.record("read", time.perf_counter() - start, len(rows))
+            self.metrics.count("articles_read", len(rows))
+            self.logger.debug("Retrieved %d articles after pk %d", len(rows), last_pk)
             
-            # Update the contents of the article_list instance list variable
-            # into the database table specified in the config file           
-            sql = scraping_config.db_update_query.format(x["TrueOrFalse"],x["pk"])
+            if rows:
+                yield rows
             
-            self.logger.debug(sql)
+            if len(rows) < chunk_size:
+                return
             
-            cursor.execute(sql)
+            last_pk = rows[-1][0]
+    
+    
+    #========================================================================
+    # This method adds the TrueProbability column, holding the probability
+    # that the article is true, to the articles table if it is missing, and
+    # the partial index of the unclassified articles. It is called on the
+    # first connection of the Classifier.
+    #
+    # Input:
+    #   conn - the database connection
+    #
+    # Return:
+    #   None
+    #========================================================================
+    def ensure_schema(self,conn):
+        table = scraping_config.db_table
+        
+        columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+        
+        if "TrueProbability" not in columns:
+            with conn:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN TrueProbability REAL")
+        
+        # The partial index only holds the unclassified articles, so that
+        # retrieving them costs in proportion to their number rather than
+        # to the size of the table
+        with conn:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_unclassified "
+                         f"ON {table}(pk) WHERE TrueOrFalse IS NULL")
+
+
+    #========================================================================
+    # This method updates the "TrueOrFalse" column of the sqlite database with 
+    # "likely true" or "likely false", and the "TrueProbability" column with 
+    # the probability that the article is true, for each record of the 
+    # articles dataframe. All the records are updated through a single 
+    # connection, with bound parameters, in one transaction.
+    #
+    # Input:
+    #   None
+    #
+    # Return:
+    #   whether the records were updated
+    #========================================================================
+    def update_articles(self):
+       
+        try:
+            # Get a database connection, closed even if the update fails
+            with contextlib.closing(self.get_db_connection()) as conn:
+                
+                # Update all the records in one transaction
+                with self.metrics.stage("write", items=len(self.df)), conn:
+                    conn.executemany(scraping_config.db_update_query,
+                                     zip(self.df["TrueOrFalse"].tolist(),
+                                         self.df["Probability"].tolist(),
+                                         self.df["pk"].tolist()))
             
-            # Close the cursor
-            cursor.close()
+            self.metrics.count("articles_written", len(self.df))
+            self.logger.debug("Saved %d articles", len(self.df))
+        
+        except Exception as e:
+            self.logger.fatal(f"Error updating records in database: {e}")
+            return False
+        
+        return True
+
+
+    #========================================================================
+    # This method writes the given predictions to the database.
+    #
+    # Input:
+    #   predictions - the list of (pk, TrueOrFalse, Probability) predictions
+    #
+    # Return:
+    #   None
+    #========================================================================
+    def write_predictions(self,predictions):
+        import pandas as pd
+        
+        self.df = pd.DataFrame(predictions, columns=["pk", "TrueOrFalse", "Probability"])
+        self.update_articles()
+
+
+    #========================================================================
+    # This method cleans and classifies the given article rows.
+    #
+    # Input:
+    #   rows - the (pk, title, article) rows to be classified
+    #
+    # Return:
+    #   the list of (pk, TrueOrFalse, Probability) predictions, in the order
+    #   of the rows
+    #========================================================================
+    def predict_rows(self,rows):
+        self.raw_article_list = rows
+        self.parse_articles()
+        self.clean_articles()
+        self.make_predictions()
+        
+        return list(zip(self.df["pk"].tolist(), self.df["TrueOrFalse"].tolist(),
+                        self.df["Probability"].tolist()))
+
+
+    #========================================================================
+    # This method classifies the given article rows, taking the predictions
+    # of the texts already classified from the prediction cache. The other
+    # texts are cleaned and classified once each, however many rows share
+    # them, and their predictions are added to the cache. The predictions of
+    # all the rows are left in the articles dataframe.
+    #
+    # Input:
+    #   rows - the (pk, title, article) rows to be classified
+    #
+    # Return:
+    #   the list of (pk, TrueOrFalse, Probability) predictions, in the order
+    #   of the rows
+    #========================================================================
+    def classify_batch(self,rows):
+        cache = self.prediction_cache
+        if cache is None:
+            return self.predict_rows(rows)
+        
+        import pandas as pd
+        
+        keys = [cache.key(row[2]) for row in rows]
+        entries = cache.get_many(keys)
+        
+        # The rows of the distinct texts missing from the cache
+        misses = {}
+        for row, key in zip(rows, keys):
+            if key not in entries and key not in misses:
+                misses[key] = row
+        
+        cached = [key for key in keys if key in entries]
+        saved = sum(entries[key][3] for key in cached)
+        
+        if misses:
+            start = time.perf_counter()
+            self.predict_rows(list(misses.values()))
+            cost = (time.perf_counter() - start) / len(misses)
             
-            # Commit the transaction
-            conn.commit()
+            new_entries = [(key, " ".join(tokens), label, probability, cost)
+                           for key, tokens, label, probability in zip(
+                               misses, self.df["tokens"], self.df["TrueOrFalse"].tolist(),
+                               self.df["Probability"].tolist())]
+            cache.put_many(new_entries)
             
-            conn.close()
+            entries.update((entry[0], entry[1:]) for entry in new_entries)
             
-            self.logger.debug("Updated db record ...")
-                        
-        except Exception as e:
-            self.logger.fatal(f"Error updating record database: {e}")
+            # The rows sharing the text of another row classified here
+            saved += cost * (len(rows) - len(cached) - len(misses))
+        
+        self.metrics.count("cache_hits", len(rows) - len(misses))
+        self.metrics.count("cache_misses", len(misses))
+        self.metrics.count("cache_saved_seconds", saved)
+        
+        predictions = [(row[0], entries[key][1], entries[key][2])
+                       for row, key in zip(rows, keys)]
+        self.df = pd.DataFrame(predictions, columns=["pk", "TrueOrFalse", "Probability"])
+        
+        return predictions
 
 
     #========================================================================
-    # This method invokes the update_record method for each record of the
-    # articles dataframe.
+    # This method cleans and classifies arbitrary texts, which are not read
+    # from or written to the database.
     #
     # Input:
-    #   None
+    #   texts - the list of texts to be classified
+    #
+    # Return:
+    #   the list of (TrueOrFalse, Probability) predictions, in the order of
+    #   the texts
+    #========================================================================
+    def classify_texts(self,texts):
+        predictions = self.classify_batch([(i, "", text) for i, text in enumerate(texts)])
+        
+        return [(true_or_false, probability) for _, true_or_false, probability in predictions]
+
+
+    #========================================================================
+    # This method cleans and classifies the given article rows in a pool of
+    # worker processes. The rows are split into chunks of the size specified
+    # in the config file, and each worker loads the pickled objects once and
+    # then classifies the chunks it is handed.
+    #
+    # Input:
+    #   rows - the (pk, title, article) rows to be classified
+    #   workers - the number of worker processes
+    #
+    # Return:
+    #   the list of (pk, TrueOrFalse, Probability) predictions, in the order
+    #   of the rows
+    #========================================================================
+    def classify_rows(self,rows,workers):
+        chunk_size = scraping_config.classifier_chunk_size
+        chunks = [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+        
+        self.logger.debug("Classifying %d articles in %d chunks with %d workers",
+                          len(rows), len(chunks), workers)
+        
+        predictions = []
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=init_worker) as executor:
+            for result in executor.map(classify_chunk, chunks):
+                predictions.extend(self.merge_chunk(result))
+        
+        return predictions
+
+
+    #========================================================================
+    # This method classifies the unclassified articles in parallel, then
+    # updates the database with the merged predictions of all the workers.
+    #
+    # Input:
+    #   workers - the number of worker processes
     #
     # Return:
     #   None
+    #========================================================================    
+    def process_parallel(self,workers):
+        # Retrieve the articles
+        self.get_articles()
+        
+        if not self.raw_article_list:
+            self.logger.debug("No articles to classify")
+            return
+        
+        # Clean and classify the articles in the worker processes
+        predictions = self.classify_rows(self.raw_article_list, workers)
+        
+        # Populate the TrueOrFalse column in the database with the predictions
+        self.write_predictions(predictions)
+
+
     #========================================================================
-    def update_articles(self):
-       
-        self.logger.debug("Saving articles ...")
-        self.df.apply(lambda x: self.update_record(x), axis=1)
+    # This method classifies the unclassified articles one chunk at a time:
+    # each chunk is retrieved, cleaned, classified and written before the 
+    # next one is retrieved, so that memory use is bounded by the chunk size
+    # rather than by the number of unclassified articles. With more than one
+    # worker, the chunks are classified in a pool of worker processes, at
+    # most two chunks per worker being in flight at any time.
+    #
+    # Input:
+    #   workers - the number of worker processes
+    #
+    # Return:
+    #   None
+    #========================================================================    
+    def process_streaming(self,workers):
+        chunks = self.iter_article_chunks()
+        
+        if workers <= 1:
+            for rows in chunks:
+                self.classify_batch(rows)
+                self.update_articles()
+            return
+        
+        pending = deque()
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=init_worker) as executor:
+            for rows in chunks:
+                pending.append(executor.submit(classify_chunk, rows))
+                
+                if len(pending) >= 2 * workers:
+                    self.write_predictions(self.merge_chunk(pending.popleft().result()))
+            
+            while pending:
+                self.write_predictions(self.merge_chunk(pending.popleft().result()))
 
 
     #========================================================================
@@ -400,33 +865,200 @@ class Classifier:
     # "likely true" or "likely false."
     #
     # Input:
+    #   workers - the number of worker processes, read from the config file
+    #             if not specified
+    #   stream - whether the articles are to be processed one chunk at a
+    #            time, read from the config file if not specified
+    #   reclassify - whether all the articles are classified again, rather
+    #                than only the unclassified ones
+    #
+    # Return:
+    #   None
+    #========================================================================    
+    def process(self,workers=None,stream=None,reclassify=False):
+        self.reclassify = reclassify
+        
+        if workers is None:
+            workers = scraping_config.classifier_workers
+        
+        if stream is None:
+            stream = scraping_config.classifier_streaming
+        
+        if stream:
+            self.process_streaming(workers)
+        elif workers > 1:
+            self.process_parallel(workers)
+        else:
+            self.process_serial()
+        
+        self.log_cache_stats()
+
+
+    #========================================================================
+    # This method classifies the unclassified articles in this process, 
+    # then updates the database with the predictions.
+    #
+    # Input:
     #   None
     #
     # Return:
     #   None
     #========================================================================    
-    def process(self):
-         # Retrieve the articles
+    def process_serial(self):
+        # Retrieve the articles
         self.get_articles()
         
-        # Parse the articles and place them into the article_list instance variable
-        self.parse_articles()
+        # Exit before loading the models if there is nothing to classify
+        if not self.raw_article_list:
+            self.logger.debug("No articles to classify")
+            return
         
-        # Clean the text of the articles
-        self.clean_articles()
-        
-        # Predict which articles are likely true and which are likely false
-        self.make_predictions()
+        # Parse, clean and classify the articles, taking the predictions of
+        # the texts already classified from the prediction cache
+        self.classify_batch(self.raw_article_list)
         
         # Populate the TrueOrFalse column in the database with the predictions
         self.update_articles()
+
+
+    #========================================================================
+    # This method adds the stage timings and counters of a chunk classified
+    # in a worker process to those of the run.
+    #
+    # Input:
+    #   result - the (predictions, metrics) result of classify_chunk
+    #
+    # Return:
+    #   the list of (pk, TrueOrFalse, Probability) predictions of the chunk
+    #========================================================================    
+    def merge_chunk(self,result):
+        predictions, metrics = result
+        self.metrics.merge(metrics)
+        
+        return predictions
+
+
+    #========================================================================
+    # This method logs the stage timings and counters of the run, and 
+    # exports them to the metrics directory specified in the config file.
+    #
+    # Input:
+    #   None
+    #
+    # Return:
+    #   None
+    #========================================================================    
+    def report_metrics(self):
+        self.metrics.log(self.logger)
+        
+        if scraping_config.metrics_dir:
+            try:
+                self.metrics.export(scraping_config.metrics_dir,
+                                    scraping_config.metrics_format)
+            except Exception as e:
+                self.logger.error(f"Error exporting the metrics: {e}")
+
+
+    #========================================================================
+    # This method logs the prediction cache hits and misses of the run, and
+    # the classification time the hits saved, from the counters of the run,
+    # which include those of the worker processes. Nothing is logged when
+    # the cache was not used.
+    #
+    # Input:
+    #   None
+    #
+    # Return:
+    #   None
+    #========================================================================    
+    def log_cache_stats(self):
+        counters = self.metrics.summary()["counters"]
+        
+        hits = counters.get("cache_hits", 0)
+        misses = counters.get("cache_misses", 0)
+        saved = counters.get("cache_saved_seconds", 0.0)
+        
+        if hits or misses:
+            self.logger.info(f"Prediction cache: {hits:.0f} hits, {misses:.0f} misses, "
+                             f"hit rate {hits / (hits + misses):.1%}, "
+                             f"{saved:.2f}s of classification saved")
+
          
+# The Classifier of a worker process
+worker_classifier = None
+
+
+#========================================================================
+# This function initializes a worker process of the parallel classification
+# by loading the spacy pipeline and the model artifacts once for the 
+# lifetime of the worker.
+#
+# Input:
+#   None
+#
+# Return:
+#   None
+#========================================================================
+def init_worker():
+    global worker_classifier
+    
+    worker_classifier = Classifier()
+    
+    # The worker is already one of several processes
+    worker_classifier.n_process = 1
+    
+    # Load the spacy pipeline and the model artifacts before the first chunk
+    worker_classifier.warm_up()
+
+
+#========================================================================
+# This function cleans and classifies a chunk of article rows in a worker
+# process.
+#
+# Input:
+#   rows - the (pk, title, article) rows to be classified
+#
+# Return:
+#   the list of (pk, TrueOrFalse, Probability) predictions of the chunk
+#========================================================================
+def classify_chunk(rows):
+    predictions = worker_classifier.classify_batch(rows)
+    
+    return predictions, worker_classifier.metrics.drain()
+
+
 if __name__ == "__main__":
 
+    parser = argparse.ArgumentParser(description="Classify the unclassified articles")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of worker processes (default: classifier_workers "
+                             "in the config file)")
+    parser.add_argument("--stream", action="store_true", default=None,
+                        help="retrieve and classify the articles one chunk at a time")
+    parser.add_argument("--reclassify", action="store_true",
+                        help="classify all the articles again, not only the unclassified ones")
+    parser.add_argument("--daemon", action="store_true",
+                        help="keep running and classify the new articles in micro-batches")
+    args = parser.parse_args()
+
     # Instantiate the Scraper class    
     classifier = Classifier()
     
-    # Process articles
-    classifier.process()
+    # Profile the run, if the config file says so
+    with profiled(scraping_config.profiler, scraping_config.profile_dir, "classifier"):
+        
+        if args.daemon:
+            from daemon import ClassifierDaemon
+            
+            # Classify the articles continuously until stopped
+            ClassifierDaemon(classifier).run()
+        
+        else:
+            # Process articles
+            classifier.process(workers=args.workers, stream=args.stream,
+                               reclassify=args.reclassify)
+    
+    # Log and export the stage timings and counters of the run
+    classifier.report_metrics()
     
     
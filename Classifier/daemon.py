@@ -0,0 +1,351 @@
+# -*- coding: utf-8 -*-
+
+# =============================================================================
+# Classification Daemon
+#
+# This module keeps a Classifier resident, with its models loaded once, and
+# classifies the new articles continuously instead of in one-shot runs. The
+# daemon polls the database for unclassified articles past the last one it
+# has seen, and groups them into micro-batches: a batch is classified as
+# soon as it is full, or once its oldest article has waited for the maximum
+# delay specified in the config file. A SIGUSR1 signal wakes the daemon up
+# to poll right away, so that the scraper can notify it of new articles.
+# SIGTERM and SIGINT stop it gracefully, once the pending articles have been
+# classified. The stage timings and counters of the Classifier are reported
+# and reset at the interval specified in the config file.
+#
+# The daemon only moves past the articles of a batch once their predictions
+# are written, so that the articles of a failed batch are retrieved again at
+# the next poll. After the number of retries specified in the config file,
+# they are classified one by one, and those that still fail are skipped.
+#
+# Usage (from the Classifier folder):
+#   python classify.py --daemon
+#
+# =============================================================================
+
+
+# Import the dependencies
+import signal
+import threading
+import time
+
+# Import the config file
+import scraping_config
+
+
+# Class ClassifierDaemon
+class ClassifierDaemon:
+
+    #========================================================================
+    # Class constructor
+    #
+    # Input:
+    #   classifier - the Classifier used to classify the articles
+    #   batch_size - the number of articles classified per batch
+    #   max_wait - the maximum time an article waits for its batch to fill
+    #              up, in seconds
+    #   poll_interval - the time between two polls of the database, in
+    #                   seconds
+    #   max_retries - the number of times a failed batch is retrieved again
+    #                 before its articles are classified one by one
+    #   metrics_interval - the time between two reports of the metrics, in
+    #                      seconds
+    #========================================================================
+    def __init__(self, classifier, batch_size=None, max_wait=None, poll_interval=None,
+                 max_retries=None, metrics_interval=None):
+        self.classifier = classifier
+        self.logger = classifier.logger
+
+        self.batch_size = batch_size or scraping_config.daemon_batch_size
+        self.max_wait = max_wait if max_wait is not None else scraping_config.daemon_max_wait
+        self.poll_interval = (poll_interval if poll_interval is not None
+                              else scraping_config.daemon_poll_interval)
+        self.max_retries = (max_retries if max_retries is not None
+                            else scraping_config.daemon_max_retries)
+        self.metrics_interval = (metrics_interval if metrics_interval is not None
+                                 else scraping_config.daemon_metrics_interval)
+
+        # Set to stop the daemon, and to wake it up before its next poll
+        self.stopping = threading.Event()
+        self.wakeup = threading.Event()
+
+        # The primary key of the last article whose prediction was written
+        self.last_pk = -2**63
+
+        # The pending articles and the time the oldest of them was retrieved
+        self.pending = []
+        self.pending_since = None
+
+        # The number of times in a row the batches have failed
+        self.failures = 0
+
+        # The time the metrics were last reported
+        self.reported = time.perf_counter()
+
+        # Daemon statistics
+        self.batches = 0
+        self.classified = 0
+        self.errors = 0
+        self.skipped = 0
+
+
+    #========================================================================
+    # This method stops the daemon once the pending articles have been
+    # classified.
+    #
+    # Input:
+    #   signum - the number of the signal received, if any
+    #   frame - the current stack frame, if any
+    #
+    # Return:
+    #   None
+    #========================================================================
+    def stop(self, signum=None, frame=None):
+        self.stopping.set()
+        self.wakeup.set()
+
+
+    #========================================================================
+    # This method wakes the daemon up to poll the database right away.
+    #
+    # Input:
+    #   signum - the number of the signal received, if any
+    #   frame - the current stack frame, if any
+    #
+    # Return:
+    #   None
+    #========================================================================
+    def notify(self, signum=None, frame=None):
+        self.wakeup.set()
+
+
+    #========================================================================
+    # This method installs the signal handlers of the daemon. Signal
+    # handlers can only be installed by the main thread.
+    #
+    # Input:
+    #   None
+    #
+    # Return:
+    #   None
+    #========================================================================
+    def install_signal_handlers(self):
+        if threading.current_thread() is not threading.main_thread():
+            return
+
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        if hasattr(signal, "SIGUSR1"):
+            signal.signal(signal.SIGUSR1, self.notify)
+
+
+    #========================================================================
+    # This method retrieves the unclassified articles past the last one
+    # pending, or else past the last one written, up to the room left in
+    # the pending batch.
+    #
+    # Input:
+    #   None
+    #
+    # Return:
+    #   the number of articles retrieved
+    #========================================================================
+    def poll(self):
+        limit = self.batch_size - len(self.pending)
+        after = self.pending[-1][0] if self.pending else self.last_pk
+
+        try:
+            conn = self.classifier.get_db_connection()
+            rows = conn.execute(scraping_config.db_retrieval_chunk_query,
+                                (after, limit)).fetchall()
+            conn.close()
+
+        except Exception as e:
+            self.logger.error(f"Error polling the database for articles: {e}")
+            return 0
+
+        if rows:
+            if not self.pending:
+                self.pending_since = time.perf_counter()
+
+            self.pending.extend(rows)
+
+        return len(rows)
+
+
+    #========================================================================
+    # This method classifies the pending articles, updates the database with
+    # the predictions and logs the latency of the batch. The articles of a
+    # failed batch are left to the next poll, unless the batches have failed
+    # more than the maximum number of retries, in which case the articles are
+    # classified one by one.
+    #
+    # Input:
+    #   None
+    #
+    # Return:
+    #   whether the predictions were written
+    #========================================================================
+    def flush(self):
+        rows = self.pending
+        waited = time.perf_counter() - self.pending_since
+
+        self.pending = []
+        self.pending_since = None
+
+        if self.failures > self.max_retries:
+            return self.flush_one_by_one(rows)
+
+        start = time.perf_counter()
+
+        try:
+            self.classifier.classify_batch(rows)
+            written = self.classifier.update_articles()
+
+        except Exception as e:
+            self.errors += len(rows)
+            self.logger.error(f"Error classifying a batch of {len(rows)} articles: {e}")
+            self.failures += 1
+            return False
+
+        if not written:
+            self.errors += len(rows)
+            self.failures += 1
+            return False
+
+        self.last_pk = rows[-1][0]
+        self.failures = 0
+        elapsed = time.perf_counter() - start
+
+        self.batches += 1
+        self.classified += len(rows)
+
+        self.logger.info(f"Classified a batch of {len(rows)} articles in {elapsed:.3f}s "
+                         f"(latency {waited + elapsed:.3f}s)")
+
+        return True
+
+
+    #========================================================================
+    # This method classifies the articles of a batch that keeps failing one
+    # by one, and skips those that cannot be classified, so that they do not
+    # hold back the newer articles. A failed write stops the batch, the
+    # database being at fault rather than the article.
+    #
+    # Input:
+    #   rows - the (pk, title, article) rows of the batch
+    #
+    # Return:
+    #   whether the predictions of all the articles not skipped were written
+    #========================================================================
+    def flush_one_by_one(self, rows):
+        for row in rows:
+            try:
+                self.classifier.classify_batch([row])
+
+            except Exception as e:
+                self.skipped += 1
+                self.logger.error(f"Skipping article {row[0]}, which cannot be classified: {e}")
+                self.last_pk = row[0]
+                continue
+
+            if not self.classifier.update_articles():
+                self.errors += 1
+                return False
+
+            self.classified += 1
+            self.last_pk = row[0]
+
+        self.failures = 0
+
+        return True
+
+
+    #========================================================================
+    # This method logs and exports the metrics of the Classifier once the
+    # reporting interval has elapsed, then resets them, so that each report
+    # covers the batches classified since the previous one.
+    #
+    # Input:
+    #   None
+    #
+    # Return:
+    #   None
+    #========================================================================
+    def report(self):
+        if time.perf_counter() - self.reported < self.metrics_interval:
+            return
+
+        self.classifier.report_metrics()
+        self.classifier.metrics.drain()
+        self.reported = time.perf_counter()
+
+
+    #========================================================================
+    # This method returns whether the pending batch is due: full, or with
+    # its oldest article having waited for the maximum delay.
+    #
+    # Input:
+    #   None
+    #
+    # Return:
+    #   whether the pending batch is to be classified
+    #========================================================================
+    def due(self):
+        if not self.pending:
+            return False
+
+        return (len(self.pending) >= self.batch_size
+                or time.perf_counter() - self.pending_since >= self.max_wait)
+
+
+    #========================================================================
+    # This method runs the daemon until it is stopped.
+    #
+    # Input:
+    #   None
+    #
+    # Return:
+    #   None
+    #========================================================================
+    def run(self):
+        self.install_signal_handlers()
+
+        # Load the models before the first batch
+        self.classifier.warm_up()
+
+        self.logger.info(f"Classifier daemon started (batch size {self.batch_size}, "
+                         f"max wait {self.max_wait}s)")
+
+        while not self.stopping.is_set():
+            self.report()
+
+            retrieved = self.poll()
+
+            if self.due():
+                # Wait before retrying the articles of a failed batch
+                if not self.flush():
+                    self.stopping.wait(self.poll_interval)
+                continue
+
+            # Poll again right away while the articles keep coming, or else
+            # wait for the next poll, the batch deadline or a notification
+            if retrieved:
+                continue
+
+            timeout = self.poll_interval
+            if self.pending:
+                timeout = min(timeout, self.pending_since + self.max_wait
+                              - time.perf_counter())
+
+            self.wakeup.wait(max(timeout, 0))
+            self.wakeup.clear()
+
+        if self.pending:
+            self.flush()
+
+        self.logger.info(f"Classifier daemon stopped after {self.batches} batches: "
+                         f"{self.classified} articles classified, {self.errors} failed, "
+                         f"{self.skipped} skipped")
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+# =============================================================================
+# Linear Inference Engine
+#
+# This module classifies TF-IDF vectors with the coefficients of the binary
+# logistic regression model trained in the Jupyter Notebook. The coefficient
+# vector and intercept are extracted from the model once, the whole sparse
+# matrix is scored with a single sparse dot product, and the class index is
+# mapped straight to the "Likely True" / "Likely False" output through a
+# precomputed lookup array. With the default threshold of 0.5, the
+# predictions are the same as those of the model's predict method followed
+# by the label encoder's inverse_transform.
+#
+# =============================================================================
+
+
+# Import the dependencies
+import math
+
+import numpy as np
+from scipy.special import expit
+
+
+# Class LinearInference
+class LinearInference:
+
+    #========================================================================
+    # Class constructor
+    #
+    # Input:
+    #   coef - the coefficient of each feature
+    #   intercept - the intercept of the model
+    #   positive_is_true - whether the positive class (index 1) is the class
+    #                      of the articles that are likely true
+    #========================================================================
+    def __init__(self, coef, intercept, positive_is_true=True):
+        # Coefficients of shape (n_features, 1) and scalar intercept
+        self.coef = np.asarray(coef, dtype=np.float64).reshape(-1, 1)
+        self.intercept = float(intercept)
+
+        # When the positive class is the true class, positive scores are
+        # those of likely true articles
+        self.positive_is_true = bool(positive_is_true)
+
+        # Output string of each prediction index
+        self.outputs = np.array(["Likely False", "Likely True"], dtype=object)
+
+
+    #========================================================================
+    # This method creates the engine from a fitted model.
+    #
+    # Input:
+    #   model - the fitted binary logistic regression model
+    #   encoder - the label encoder of the model's classes
+    #   true_label - the class of the articles that are likely true
+    # Return:
+    #   the LinearInference engine
+    #========================================================================
+    @classmethod
+    def from_model(cls, model, encoder, true_label="REAL"):
+        if len(model.classes_) != 2:
+            raise ValueError("Only binary models are supported, not {} classes"
+                             .format(len(model.classes_)))
+
+        classes = encoder.inverse_transform(model.classes_)
+
+        return cls(model.coef_[0], model.intercept_[0], classes[1] == true_label)
+
+
+    #========================================================================
+    # This method creates the engine from a model artifact bundle, keeping
+    # its memory-mapped coefficients.
+    #
+    # Input:
+    #   bundle - the ModelBundle
+    # Return:
+    #   the LinearInference engine
+    #========================================================================
+    @classmethod
+    def from_bundle(cls, bundle):
+        return cls(bundle.coef, bundle.intercept, bundle.positive_is_true)
+
+
+    # ========================================================================
+    # This method returns the decision scores of the TF-IDF vectors: positive
+    # scores select the second class of the model.
+    #
+    # Input:
+    #     X - the CSR matrix of TF-IDF vectors
+    # Return:
+    #     the array of decision scores
+    # ========================================================================
+    def decision_function(self, X):
+        return (X @ self.coef).ravel() + self.intercept
+
+
+    # ========================================================================
+    # This method classifies the TF-IDF vectors. The threshold is compared in
+    # score space, where a probability of 0.5 is a score of exactly 0.
+    #
+    # Input:
+    #     X - the CSR matrix of TF-IDF vectors
+    #     threshold - the probability above which an article is likely true
+    # Return:
+    #     the array of "Likely True" / "Likely False" outputs, and the array
+    #     of the probabilities that the articles are true
+    # ========================================================================
+    def predict(self, X, threshold=0.5):
+        scores = self.decision_function(X)
+        if not self.positive_is_true:
+            scores = -scores
+
+        if threshold <= 0.0:
+            score_threshold = -math.inf
+        elif threshold >= 1.0:
+            score_threshold = math.inf
+        else:
+            score_threshold = math.log(threshold / (1.0 - threshold))
+
+        outputs = self.outputs[(scores > score_threshold).astype(np.intp)]
+
+        return outputs, expit(scores)
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+
+# =============================================================================
+# Classification Server Load Test
+#
+# This script sends classification requests to a running classification
+# server, from the specified number of concurrent clients each holding a
+# keep-alive connection, then reports the throughput, the client-side
+# latency percentiles, the response statuses and the batch sizes reported
+# by the server's /metrics endpoint.
+#
+# Usage (from the Classifier folder, with server.py running):
+#   python load_test.py [--requests N] [--concurrency C] [--host H] [--port P]
+#
+# =============================================================================
+
+
+# Import the dependencies
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+# Import the config file
+import scraping_config
+
+from bench_normalizer import sample_articles
+
+
+#========================================================================
+# This function sends a request on a keep-alive connection and reads the
+# response.
+#
+# Input:
+#   reader - the stream reader of the connection
+#   writer - the stream writer of the connection
+#   method - the HTTP method
+#   path - the path of the request
+#   body - the JSON-serializable body of the request, if any
+#
+# Return:
+#   the HTTP status and the decoded JSON response
+#========================================================================
+async def request(reader, writer, method, path, body=None):
+    payload = json.dumps(body).encode("utf-8") if body is not None else b""
+
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+                 f"Content-Type: application/json\r\n"
+                 f"Content-Length: {len(payload)}\r\n\r\n".encode("latin-1") + payload)
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+
+    return status, json.loads(await reader.readexactly(length))
+
+
+#========================================================================
+# This function runs a client sending the requests of a shared queue.
+#
+# Input:
+#   host - the host name of the server
+#   port - the port of the server
+#   texts - the queue of texts to be classified
+#   latencies - the list to which the request latencies are appended
+#   statuses - the dictionary counting the response statuses
+#
+# Return:
+#   None
+#========================================================================
+async def client(host, port, texts, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+
+    try:
+        while not texts.empty():
+            text = texts.get_nowait()
+
+            start = time.perf_counter()
+            status, _ = await request(reader, writer, "POST", "/classify", {"text": text})
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    finally:
+        writer.close()
+
+
+#========================================================================
+# This function runs the load test.
+#
+# Input:
+#   host - the host name of the server
+#   port - the port of the server
+#   count - the number of requests
+#   concurrency - the number of concurrent clients
+#
+# Return:
+#   None
+#========================================================================
+async def load_test(host, port, count, concurrency):
+    texts = asyncio.Queue()
+    for text in sample_articles(count):
+        texts.put_nowait(text)
+
+    latencies = []
+    statuses = {}
+
+    start = time.perf_counter()
+    await asyncio.gather(*[client(host, port, texts, latencies, statuses)
+                           for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    percentile = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+    print(f"requests: {len(latencies)}  concurrency: {concurrency}  "
+          f"throughput: {len(latencies) / elapsed:.1f} req/s")
+    print(f"latency  mean: {statistics.mean(latencies) * 1e3:.1f} ms  "
+          f"p50: {percentile(0.5) * 1e3:.1f} ms  p90: {percentile(0.9) * 1e3:.1f} ms  "
+          f"p99: {percentile(0.99) * 1e3:.1f} ms")
+    print(f"statuses: {statuses}")
+
+    reader, writer = await asyncio.open_connection(host, port)
+    _, metrics = await request(reader, writer, "GET", "/metrics")
+    writer.close()
+
+    print(f"server batch sizes: {metrics['batch_sizes']}")
+    print(f"server request latency quantiles: {metrics['request_latency']['quantiles']}")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Load test the classification server")
+    parser.add_argument("--requests", type=int, default=2000, help="number of requests")
+    parser.add_argument("--concurrency", type=int, default=32, help="number of clients")
+    parser.add_argument("--host", default=scraping_config.server_host, help="server host")
+    parser.add_argument("--port", type=int, default=scraping_config.server_port,
+                        help="server port")
+    args = parser.parse_args()
+
+    asyncio.run(load_test(args.host, args.port, args.requests, args.concurrency))
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+# =============================================================================
+# Text Normalizer
+#
+# This module performs the lowercasing, sentence spacing, numeric token
+# removal, punctuation stripping and stopword filtering of an article's text
+# in a single tokenization pass. The translation tables and regular
+# expressions are compiled once, when the normalizer is created, rather than
+# for every article.
+#
+# =============================================================================
+
+
+# Import the dependencies
+import re
+import string
+
+
+# Class TextNormalizer
+class TextNormalizer:
+
+    # Regular expression used to place a space between a period or comma at
+    # the end of a sentence and the beginning of the following sentence
+    SENTENCE_SPACING = re.compile(r'(\s\w+[\.\,])(\w+\s)', flags=re.IGNORECASE)
+
+    # Translation table that deletes the punctuation characters
+    PUNCTUATION_TABLE = str.maketrans("", "", string.punctuation)
+
+    #========================================================================
+    # Class constructor
+    #
+    # Input:
+    #   stop_words - the set of stopwords to be filtered out of the text
+    #========================================================================
+    def __init__(self, stop_words=()):
+        self.stop_words = frozenset(stop_words)
+
+
+    # ========================================================================
+    # This method transforms a given passage of text to lower case. The
+    # capital sigma is lowered first so that str.lower produces the same
+    # result as lowering the text one character at a time (str.lower would
+    # otherwise turn a word-final sigma into a final sigma).
+    #
+    # Input:
+    #     text - the text to be transformed to lower case
+    # Return:
+    #     the text in lower case
+    # ========================================================================
+    def to_lower(self, text):
+        return text.replace("Σ", "σ").lower()
+
+
+    # ========================================================================
+    # This method returns the list of normalized tokens of the text
+    #
+    # Input:
+    #     text - the text to be normalized
+    # Return:
+    #     the list of normalized tokens
+    # ========================================================================
+    def tokens(self, text):
+        text = self.SENTENCE_SPACING.sub('\\1 \\2', self.to_lower(text))
+
+        stop_words = self.stop_words
+        table = self.PUNCTUATION_TABLE
+
+        tokens = []
+        for word in text.split():
+
+            # Numeric tokens are dropped before the punctuation is removed
+            if word.isnumeric():
+                continue
+
+            word = word.translate(table)
+
+            # Tokens made only of punctuation vanish altogether
+            if word and word not in stop_words:
+                tokens.append(word)
+
+        return tokens
+
+
+    # ========================================================================
+    # This method normalizes the text of an article
+    #
+    # Input:
+    #     text - the text to be normalized
+    # Return:
+    #     the normalized text, its tokens separated by single spaces
+    # ========================================================================
+    def normalize(self, text):
+        return " ".join(self.tokens(text))
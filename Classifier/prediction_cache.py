@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+
+# =============================================================================
+# Prediction Cache
+#
+# This module keeps the predictions of the classified articles in a SQLite
+# file, keyed by a hash of the raw article text and of the fingerprint of
+# the model artifacts, so that the copies of a syndicated story and the
+# articles scraped again skip cleaning and inference. Each entry holds the
+# cleaned lemmas, the prediction and the time its classification took.
+# Once the cache holds more entries than its limit, the least recently used
+# are evicted. When the fingerprint of the model artifacts changes, the
+# cache is emptied.
+#
+# =============================================================================
+
+
+# Import the dependencies
+import hashlib
+import os
+import sqlite3
+import time
+
+
+# The number of keys looked up per query
+LOOKUP_BATCH = 500
+
+
+# Class PredictionCache
+class PredictionCache:
+
+    #========================================================================
+    # Class constructor
+    #
+    # Input:
+    #   path - the path of the cache file
+    #   fingerprint - the fingerprint of the model artifacts
+    #   max_entries - the maximum number of entries kept
+    #========================================================================
+    def __init__(self, path, fingerprint, max_entries):
+        self.fingerprint = fingerprint
+        self.max_entries = max_entries
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS predictions (key TEXT PRIMARY KEY, "
+                              "tokens TEXT, label TEXT, probability REAL, cost REAL, "
+                              "used_at REAL)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_predictions_used_at "
+                              "ON predictions(used_at)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value)")
+
+            # The hits and misses are counted in the metrics of the runs,
+            # not in the cache file any more
+            self.conn.execute("DROP TABLE IF EXISTS stats")
+
+            # Empty the cache when the model artifacts have changed
+            row = self.conn.execute("SELECT value FROM meta WHERE name = 'fingerprint'") \
+                .fetchone()
+            if row is None or row[0] != fingerprint:
+                self.conn.execute("DELETE FROM predictions")
+                self.conn.execute("INSERT OR REPLACE INTO meta (name, value) "
+                                  "VALUES ('fingerprint', ?)", (fingerprint,))
+
+
+    #========================================================================
+    # This method returns the cache key of an article text.
+    #
+    # Input:
+    #   text - the raw text of the article
+    #
+    # Return:
+    #   the hexadecimal key
+    #========================================================================
+    def key(self, text):
+        digest = hashlib.sha256(self.fingerprint.encode("utf-8"))
+        digest.update(text.encode("utf-8", "surrogatepass"))
+
+        return digest.hexdigest()
+
+
+    #========================================================================
+    # This method looks up the specified keys, and marks the entries found
+    # as recently used.
+    #
+    # Input:
+    #   keys - the list of keys
+    #
+    # Return:
+    #   the dictionary mapping the keys found to their (tokens, label,
+    #   probability, cost) entries
+    #========================================================================
+    def get_many(self, keys):
+        keys = list(set(keys))
+        entries = {}
+
+        for i in range(0, len(keys), LOOKUP_BATCH):
+            batch = keys[i:i + LOOKUP_BATCH]
+            placeholders = ",".join("?" * len(batch))
+
+            for key, tokens, label, probability, cost in self.conn.execute(
+                    f"SELECT key, tokens, label, probability, cost FROM predictions "
+                    f"WHERE key IN ({placeholders})", batch):
+                entries[key] = (tokens, label, probability, cost)
+
+        if entries:
+            now = time.time()
+            with self.conn:
+                self.conn.executemany("UPDATE predictions SET used_at = ? WHERE key = ?",
+                                      ((now, key) for key in entries))
+
+        return entries
+
+
+    #========================================================================
+    # This method stores entries, then evicts the least recently used
+    # entries if the cache holds more than its limit.
+    #
+    # Input:
+    #   entries - the iterable of (key, tokens, label, probability, cost)
+    #             entries
+    #
+    # Return:
+    #   None
+    #========================================================================
+    def put_many(self, entries):
+        now = time.time()
+
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO predictions "
+                                  "(key, tokens, label, probability, cost, used_at) "
+                                  "VALUES (?, ?, ?, ?, ?, ?)",
+                                  (entry + (now,) for entry in entries))
+
+        self.evict()
+
+
+    #========================================================================
+    # This method evicts the least recently used entries down to 90% of the
+    # limit, once the cache holds more entries than its limit.
+    #
+    # Input:
+    #   None
+    #
+    # Return:
+    #   the number of entries evicted
+    #========================================================================
+    def evict(self):
+        count = self.conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+        if count <= self.max_entries:
+            return 0
+
+        excess = count - int(self.max_entries * 0.9)
+
+        with self.conn:
+            self.conn.execute("DELETE FROM predictions WHERE key IN (SELECT key FROM "
+                              "predictions ORDER BY used_at LIMIT ?)", (excess,))
+
+        return excess
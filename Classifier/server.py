@@ -0,0 +1,470 @@
+# -*- coding: utf-8 -*-
+
+# =============================================================================
+# Classification Server
+#
+# This module serves the Classifier over HTTP, so that arbitrary texts can
+# be classified on demand without going through the database. The server is
+# an asyncio front end; the requests are put in a bounded queue, from which
+# a dynamic batcher groups the texts of concurrent requests into a single
+# clean-vectorize-predict call, run in a worker thread so that the event
+# loop keeps accepting requests. A request is rejected with 503 when the
+# queue is full, with 413 when it has more texts than a batch holds, and
+# answered with 504 when it is not classified within the timeout specified
+# in the config file.
+#
+# Endpoints:
+#   POST /classify - classifies {"text": "..."} or {"texts": ["...", ...]}
+#   GET /metrics   - returns the request and batch latency histograms
+#   GET /health    - returns 200 once the models are loaded
+#
+# Usage (from the Classifier folder):
+#   python server.py [--host HOST] [--port PORT]
+#
+# =============================================================================
+
+
+# Import the dependencies
+import argparse
+import asyncio
+import json
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+# Import the config file
+import scraping_config
+
+from classify import Classifier
+
+
+# Class LatencyHistogram
+class LatencyHistogram:
+
+    # The upper bounds of the buckets, in seconds
+    BOUNDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf)
+
+    #========================================================================
+    # Class constructor
+    #========================================================================
+    def __init__(self):
+        self.counts = [0] * len(self.BOUNDS)
+        self.count = 0
+        self.total = 0.0
+
+
+    #========================================================================
+    # This method records an observation.
+    #
+    # Input:
+    #   value - the observed latency, in seconds
+    #
+    # Return:
+    #   None
+    #========================================================================
+    def observe(self, value):
+        for i, bound in enumerate(self.BOUNDS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+        self.count += 1
+        self.total += value
+
+
+    #========================================================================
+    # This method returns the value below which the specified fraction of
+    # the observations fall, as the upper bound of its bucket.
+    #
+    # Input:
+    #   fraction - the fraction of the observations, between 0 and 1
+    #
+    # Return:
+    #   the upper bound of the bucket, in seconds
+    #========================================================================
+    def quantile(self, fraction):
+        rank = fraction * self.count
+        cumulative = 0
+
+        for bound, count in zip(self.BOUNDS, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+
+        return math.inf
+
+
+    #========================================================================
+    # This method returns the histogram as a dictionary.
+    #
+    # Input:
+    #   None
+    #
+    # Return:
+    #   the dictionary of the cumulative bucket counts, count, sum, mean and
+    #   quantiles of the observations
+    #========================================================================
+    def snapshot(self):
+        buckets = {}
+        cumulative = 0
+        for bound, count in zip(self.BOUNDS, self.counts):
+            cumulative += count
+            buckets["+Inf" if bound == math.inf else str(bound)] = cumulative
+
+        quantiles = {q: self.quantile(q) for q in (0.5, 0.9, 0.99)}
+
+        return {
+            "buckets": buckets,
+            "count": self.count,
+            "sum": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "quantiles": {str(q): (None if v == math.inf else v)
+                          for q, v in quantiles.items()},
+        }
+
+
+# Class ClassificationServer
+class ClassificationServer:
+
+    #========================================================================
+    # Class constructor
+    #
+    # Input:
+    #   classifier - the Classifier used to classify the texts
+    #   max_batch - the maximum number of texts classified per batch
+    #   max_delay - the maximum time the batcher waits for more requests
+    #               once it has one, in seconds
+    #   queue_size - the maximum number of requests waiting to be batched
+    #   timeout - the time after which a request is answered with 504, in
+    #             seconds
+    #========================================================================
+    def __init__(self, classifier, max_batch=None, max_delay=None,
+                 queue_size=None, timeout=None):
+        self.classifier = classifier
+        self.logger = classifier.logger
+
+        self.max_batch = max_batch or scraping_config.server_max_batch
+        self.max_delay = (max_delay if max_delay is not None
+                          else scraping_config.server_max_delay)
+        self.queue_size = queue_size or scraping_config.server_queue_size
+        self.timeout = timeout or scraping_config.server_timeout
+
+        # The single thread running the classification, off the event loop
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+        # Created in the event loop by start
+        self.queue = None
+
+        # Server statistics
+        self.request_latency = LatencyHistogram()
+        self.batch_latency = LatencyHistogram()
+        self.batch_sizes = {}
+        self.responses = {}
+        self.ready = False
+
+
+    #========================================================================
+    # This method classifies the texts of a request: it queues them for the
+    # batcher and waits for their predictions.
+    #
+    # Input:
+    #   texts - the list of texts of the request
+    #
+    # Return:
+    #   the HTTP status and the list of predictions, or the error message
+    #========================================================================
+    async def submit(self, texts):
+        future = asyncio.get_running_loop().create_future()
+
+        try:
+            self.queue.put_nowait((texts, future))
+        except asyncio.QueueFull:
+            return HTTPStatus.SERVICE_UNAVAILABLE, "the request queue is full"
+
+        try:
+            predictions = await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            # The texts are still classified if their batch has started, but
+            # the predictions are dropped
+            future.cancel()
+            return HTTPStatus.GATEWAY_TIMEOUT, "the request timed out"
+        except Exception as e:
+            return HTTPStatus.INTERNAL_SERVER_ERROR, str(e)
+
+        return HTTPStatus.OK, [{"label": label, "probability": probability}
+                               for label, probability in predictions]
+
+
+    #========================================================================
+    # This method runs the batcher: it takes the queued requests, groups
+    # those arriving within the maximum delay, up to the maximum batch size,
+    # and classifies their texts in a single call. A request that does not
+    # fit in the batch is held for the next one.
+    #
+    # Input:
+    #   None
+    #
+    # Return:
+    #   None
+    #========================================================================
+    async def batcher(self):
+        loop = asyncio.get_running_loop()
+
+        # The request held back from the last batch, which it did not fit in
+        held = None
+
+        while True:
+            batch = [held or await self.queue.get()]
+            size = len(batch[0][0])
+            held = None
+            deadline = loop.time() + self.max_delay
+
+            while size < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+
+                try:
+                    request = await asyncio.wait_for(self.queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+
+                if size + len(request[0]) > self.max_batch:
+                    held = request
+                    break
+
+                batch.append(request)
+                size += len(request[0])
+
+            # Skip the requests that have timed out while queued
+            batch = [(texts, future) for texts, future in batch if not future.done()]
+            if not batch:
+                continue
+
+            texts = [text for request_texts, _ in batch for text in request_texts]
+
+            start = time.perf_counter()
+            try:
+                predictions = await loop.run_in_executor(
+                    self.executor, self.classifier.classify_texts, texts)
+
+            except Exception as e:
+                self.logger.error(f"Error classifying a batch of {len(texts)} texts: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batch_latency.observe(time.perf_counter() - start)
+            self.batch_sizes[len(texts)] = self.batch_sizes.get(len(texts), 0) + 1
+
+            offset = 0
+            for request_texts, future in batch:
+                if not future.done():
+                    future.set_result(predictions[offset:offset + len(request_texts)])
+                offset += len(request_texts)
+
+
+    #========================================================================
+    # This method returns the server metrics.
+    #
+    # Input:
+    #   None
+    #
+    # Return:
+    #   the dictionary of metrics
+    #========================================================================
+    def metrics(self):
+        return {
+            "request_latency": self.request_latency.snapshot(),
+            "batch_latency": self.batch_latency.snapshot(),
+            "batch_sizes": {str(k): v for k, v in sorted(self.batch_sizes.items())},
+            "responses": {str(k): v for k, v in sorted(self.responses.items())},
+            "queue_depth": self.queue.qsize(),
+        }
+
+
+    #========================================================================
+    # This method handles a request.
+    #
+    # Input:
+    #   method - the HTTP method of the request
+    #   path - the path of the request
+    #   body - the body of the request
+    #
+    # Return:
+    #   the HTTP status and the JSON-serializable response
+    #========================================================================
+    async def route(self, method, path, body):
+        if path == "/health" and method == "GET":
+            if self.ready:
+                return HTTPStatus.OK, {"status": "ok"}
+            return HTTPStatus.SERVICE_UNAVAILABLE, {"status": "loading"}
+
+        if path == "/metrics" and method == "GET":
+            return HTTPStatus.OK, self.metrics()
+
+        if path != "/classify":
+            return HTTPStatus.NOT_FOUND, {"error": "not found"}
+
+        if method != "POST":
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "use POST"}
+
+        try:
+            request = json.loads(body)
+            single = "text" in request
+            texts = [request["text"]] if single else request["texts"]
+
+            if (not isinstance(texts, list) or not texts
+                    or not all(isinstance(text, str) for text in texts)):
+                raise ValueError("texts must be a non-empty list of strings")
+
+        except (ValueError, KeyError, TypeError) as e:
+            return HTTPStatus.BAD_REQUEST, {"error": f"invalid request: {e}"}
+
+        if len(texts) > self.max_batch:
+            return HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {
+                "error": f"at most {self.max_batch} texts per request"}
+
+        start = time.perf_counter()
+        status, result = await self.submit(texts)
+
+        if status == HTTPStatus.OK:
+            self.request_latency.observe(time.perf_counter() - start)
+            return status, result[0] if single else {"predictions": result}
+
+        return status, {"error": result}
+
+
+    #========================================================================
+    # This method serves the requests of a client connection, keeping the
+    # connection alive between requests unless the client closes it.
+    #
+    # Input:
+    #   reader - the stream reader of the connection
+    #   writer - the stream writer of the connection
+    #
+    # Return:
+    #   None
+    #========================================================================
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                # A line longer than the stream limit is not read
+                try:
+                    request_line = await reader.readline()
+                    if not request_line:
+                        break
+
+                    try:
+                        method, path, version = request_line.decode("latin-1").split()
+                    except ValueError:
+                        break
+
+                    headers = {}
+                    while True:
+                        line = await reader.readline()
+                        if line in (b"\r\n", b"\n", b""):
+                            break
+                        name, _, value = line.decode("latin-1").partition(":")
+                        headers[name.strip().lower()] = value.strip()
+
+                    overlong = False
+
+                except (ValueError, asyncio.LimitOverrunError):
+                    overlong = True
+
+                if not overlong:
+                    try:
+                        length = int(headers.get("content-length", 0))
+                        if length < 0:
+                            raise ValueError
+                    except ValueError:
+                        length = None
+
+                # The body of a request is not read past an invalid head or
+                # length, and the connection is closed
+                if overlong:
+                    status, response = HTTPStatus.BAD_REQUEST, {"error": "line too long"}
+                    keep_alive = False
+                elif length is None:
+                    status, response = HTTPStatus.BAD_REQUEST, {"error": "invalid Content-Length"}
+                    keep_alive = False
+                elif length > scraping_config.server_max_body:
+                    status, response = HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "too large"}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    status, response = await self.route(method, path.split("?")[0], body)
+                    keep_alive = (headers.get("connection", "").lower() != "close"
+                                  and version == "HTTP/1.1")
+
+                self.responses[status.value] = self.responses.get(status.value, 0) + 1
+
+                payload = json.dumps(response).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                    .encode("latin-1") + payload)
+                await writer.drain()
+
+                if not keep_alive:
+                    break
+
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+
+        finally:
+            writer.close()
+
+
+    #========================================================================
+    # This method loads the models and serves the requests until the server
+    # is stopped.
+    #
+    # Input:
+    #   host - the host name the server listens on
+    #   port - the port the server listens on
+    #
+    # Return:
+    #   None
+    #========================================================================
+    async def serve(self, host, port):
+        self.queue = asyncio.Queue(self.queue_size)
+
+        server = await asyncio.start_server(self.handle, host, port)
+        batcher = asyncio.create_task(self.batcher())
+
+        # Load the models in the worker thread, before the first batch
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self.classifier.warm_up)
+        self.ready = True
+
+        self.logger.info(f"Classification server listening on {host}:{port}")
+
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+            self.executor.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Serve the classifier over HTTP")
+    parser.add_argument("--host", default=scraping_config.server_host,
+                        help="host name to listen on")
+    parser.add_argument("--port", type=int, default=scraping_config.server_port,
+                        help="port to listen on")
+    args = parser.parse_args()
+
+    server = ClassificationServer(Classifier())
+
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
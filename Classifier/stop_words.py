@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+# =============================================================================
+# Stop Words
+#
+# This module loads the English stopwords of the NLTK corpus together with
+# the customized stopwords of the text file identified in the config file.
+# The stopwords are loaded once per process and kept in a frozenset that is
+# shared by every caller, until they are explicitly reloaded.
+#
+# =============================================================================
+
+
+# Import the dependencies
+import threading
+
+# Import the config file
+import scraping_config
+
+
+# The shared set of stopwords, loaded on first use
+_stop_words = None
+
+# Lock guarding the loading of the shared set of stopwords
+_lock = threading.Lock()
+
+
+#========================================================================
+# This function reads the stopwords from the NLTK corpus and from the
+# customized stopwords file.
+#
+# Input:
+#   None
+#
+# Return:
+#   the frozenset of stopwords
+#========================================================================
+def _read_stop_words():
+    # NLTK is only imported when the stopwords are first needed
+    from nltk.corpus import stopwords
+
+    sw1 = stopwords.words("english")
+
+    with open(scraping_config.stop_words_file) as f:
+        sw2 = f.read().splitlines()
+
+    return frozenset(sw1 + sw2)
+
+
+#========================================================================
+# This function returns the shared set of stopwords, loading it if it has
+# not been loaded yet by this process.
+#
+# Input:
+#   None
+#
+# Return:
+#   the frozenset of stopwords
+#========================================================================
+def load_stop_words():
+    global _stop_words
+
+    if _stop_words is None:
+        with _lock:
+            if _stop_words is None:
+                _stop_words = _read_stop_words()
+
+    return _stop_words
+
+
+#========================================================================
+# This function reloads the shared set of stopwords, so that changes to
+# the stopwords file are picked up without restarting the process.
+#
+# Input:
+#   None
+#
+# Return:
+#   the reloaded frozenset of stopwords
+#========================================================================
+def reload_stop_words():
+    global _stop_words
+
+    with _lock:
+        _stop_words = _read_stop_words()
+
+    return _stop_words
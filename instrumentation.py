@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+"""
+Instrumentation
+
+This module records how long the stages of the scraper and classifier runs
+take, and counts what they process: articles, bytes, cache hits. The stages
+are timed with a context manager, from any thread, and the timings of the
+classifier worker processes are merged into those of the parent process.
+At the end of a run, a summary of the stages and counters is logged and
+exported as JSON or in the Prometheus text format, so that it can be read
+by the node exporter textfile collector.
+
+A run can also be profiled, with cProfile or pyinstrument, when the config
+file says so.
+
+"""
+
+# Import the dependencies
+import contextlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+
+
+# Class Metrics
+class Metrics:
+
+    #========================================================================
+    # Class constructor
+    #
+    # Input:
+    #   name - the name of the run, used as the prefix of the Prometheus
+    #          metrics
+    def __init__(self, name):
+        self.name = name
+        self.lock = threading.Lock()
+
+        # The [calls, items, seconds, max seconds] of each stage, and the
+        # value of each counter, in the order they were first recorded
+        self.stages = {}
+        self.counters = {}
+
+        self.started = datetime.now(timezone.utc)
+        self.start_time = time.perf_counter()
+
+    #========================================================================
+    # This method times a stage: the time spent in the with block is
+    # recorded, even if the block raises, in which case the errors counter
+    # of the stage is incremented.
+    #
+    # Input:
+    #   name - the name of the stage
+    #   items - the number of items processed by the stage
+    #
+    # Return:
+    #   the context manager timing the stage
+    @contextlib.contextmanager
+    def stage(self, name, items=1):
+        start = time.perf_counter()
+
+        try:
+            yield
+
+        except Exception:
+            self.count(name + "_errors")
+            raise
+
+        finally:
+            self.record(name, time.perf_counter() - start, items)
+
+    #========================================================================
+    # This method records the processing of items by a stage.
+    #
+    # Input:
+    #   name - the name of the stage
+    #   elapsed - the time taken, in seconds
+    #   items - the number of items processed
+    #
+    # Return:
+    #   None
+    def record(self, name, elapsed, items=1):
+        with self.lock:
+            stage = self.stages.get(name)
+
+            if stage is None:
+                self.stages[name] = [1, items, elapsed, elapsed]
+            else:
+                stage[0] += 1
+                stage[1] += items
+                stage[2] += elapsed
+                if elapsed > stage[3]:
+                    stage[3] = elapsed
+
+    #========================================================================
+    # This method adds to a counter.
+    #
+    # Input:
+    #   name - the name of the counter
+    #   value - the value added
+    #
+    # Return:
+    #   None
+    def count(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    #========================================================================
+    # This method returns the recorded stages and counters, and resets them,
+    # so that a worker process can hand them over to its parent after each
+    # chunk, or a long-running process can report them one period at a time.
+    # The next summary covers the time since the drain.
+    #
+    # Input:
+    #   None
+    #
+    # Return:
+    #   the (stages, counters) tuple, to be passed to merge
+    def drain(self):
+        with self.lock:
+            drained = (self.stages, self.counters)
+            self.stages = {}
+            self.counters = {}
+
+            self.started = datetime.now(timezone.utc)
+            self.start_time = time.perf_counter()
+
+        return drained
+
+    #========================================================================
+    # This method adds the stages and counters drained from another Metrics.
+    #
+    # Input:
+    #   drained - the (stages, counters) tuple returned by drain
+    #
+    # Return:
+    #   None
+    def merge(self, drained):
+        stages, counters = drained
+
+        with self.lock:
+            for name, (calls, items, seconds, max_seconds) in stages.items():
+                stage = self.stages.setdefault(name, [0, 0, 0.0, 0.0])
+                stage[0] += calls
+                stage[1] += items
+                stage[2] += seconds
+                stage[3] = max(stage[3], max_seconds)
+
+            for name, value in counters.items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    #========================================================================
+    # This method returns the summary of the run.
+    #
+    # Input:
+    #   None
+    #
+    # Return:
+    #   the dictionary of the run, its stages and its counters
+    def summary(self):
+        with self.lock:
+            stages = {name: {"calls": calls,
+                             "items": items,
+                             "seconds": seconds,
+                             "max_seconds": max_seconds,
+                             "items_per_second": items / seconds if seconds else 0.0}
+                      for name, (calls, items, seconds, max_seconds)
+                      in self.stages.items()}
+
+            return {"run": self.name,
+                    "started": self.started.isoformat(),
+                    "elapsed": time.perf_counter() - self.start_time,
+                    "stages": stages,
+                    "counters": dict(self.counters)}
+
+    #========================================================================
+    # This method returns the summary of the run in the Prometheus text
+    # format.
+    #
+    # Input:
+    #   None
+    #
+    # Return:
+    #   the text of the metrics
+    def prometheus(self):
+        summary = self.summary()
+        prefix = self.name
+
+        lines = [f"# TYPE {prefix}_run_seconds gauge",
+                 f"{prefix}_run_seconds {summary['elapsed']:.6f}",
+                 f"# TYPE {prefix}_run_started_seconds gauge",
+                 f"{prefix}_run_started_seconds {self.started.timestamp():.3f}"]
+
+        for metric, field in [("stage_calls_total", "calls"),
+                              ("stage_items_total", "items"),
+                              ("stage_seconds_total", "seconds"),
+                              ("stage_max_seconds", "max_seconds")]:
+            kind = "gauge" if metric.endswith("max_seconds") else "counter"
+            lines.append(f"# TYPE {prefix}_{metric} {kind}")
+
+            for name, stage in summary["stages"].items():
+                lines.append(f'{prefix}_{metric}{{stage="{name}"}} {stage[field]:g}')
+
+        for name, value in summary["counters"].items():
+            metric = re.sub(r"[^a-zA-Z0-9_]", "_", name)
+            lines.append(f"# TYPE {prefix}_{metric}_total counter")
+            lines.append(f"{prefix}_{metric}_total {value:g}")
+
+        return "\n".join(lines) + "\n"
+
+    #========================================================================
+    # This method logs the stages and counters of the run.
+    #
+    # Input:
+    #   logger - the logger
+    #
+    # Return:
+    #   None
+    def log(self, logger):
+        summary = self.summary()
+
+        for name, stage in summary["stages"].items():
+            logger.info("Stage %s: %d items in %d calls, %.3fs (max %.3fs, %.1f items/s)",
+                        name, stage["items"], stage["calls"], stage["seconds"],
+                        stage["max_seconds"], stage["items_per_second"])
+
+        if summary["counters"]:
+            logger.info("Counters: %s", ", ".join(
+                f"{name} {value:g}" for name, value in summary["counters"].items()))
+
+        logger.info("Run %s took %.3fs", self.name, summary["elapsed"])
+
+    #========================================================================
+    # This method writes the summary of the run to a file, replacing the
+    # file of the previous run at once, so that it is never read half
+    # written.
+    #
+    # Input:
+    #   directory - the directory of the file
+    #   format - "json" or "prometheus"
+    #
+    # Return:
+    #   the path of the file
+    def export(self, directory, format="json"):
+        if format == "prometheus":
+            path = os.path.join(directory, self.name + ".prom")
+            text = self.prometheus()
+        else:
+            path = os.path.join(directory, self.name + ".json")
+            text = json.dumps(self.summary(), indent=2)
+
+        os.makedirs(directory, exist_ok=True)
+
+        temporary = path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            file.write(text)
+        os.replace(temporary, path)
+
+        return path
+
+
+#========================================================================
+# This function profiles the with block with the specified profiler, and
+# saves the profile to the specified directory: a .prof file of pstats for
+# cProfile, readable with snakeviz or python -m pstats, or an .html page for
+# pyinstrument. cProfile is used when pyinstrument is not installed.
+#
+# Input:
+#   profiler - "cprofile", "pyinstrument", or None not to profile
+#   directory - the directory of the profiles
+#   name - the name of the run, used in the file name of the profile
+#
+# Return:
+#   the context manager profiling the block
+@contextlib.contextmanager
+def profiled(profiler, directory, name):
+    if not profiler:
+        yield
+        return
+
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, "{}-{}".format(
+        name, datetime.now().strftime("%Y%m%d-%H%M%S")))
+
+    if profiler == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            logging.getLogger(__name__).warning(
+                "pyinstrument is not installed, profiling with cProfile")
+        else:
+            session = Profiler()
+            session.start()
+            try:
+                yield
+            finally:
+                session.stop()
+                with open(path + ".html", "w", encoding="utf-8") as file:
+                    file.write(session.output_html())
+            return
+
+    import cProfile
+
+    session = cProfile.Profile()
+    session.enable()
+    try:
+        yield
+    finally:
+        session.disable()
+        session.dump_stats(path + ".prof")
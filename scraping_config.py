@@ -5,6 +5,7 @@ This is the config file for the web-scraping-classification project
 """
 apis = [{ 
                 'name': 'mediastack',
+                'scheme': 'http',
                 'url': 'api.mediastack.com',
                 'uri': '/v1/news?{}',
                 'file': "mediastack.txt",
@@ -19,10 +20,14 @@ apis = [{
                 'article-list': "data",
                 'article-title': "title",
                 'article-url': "url",
+                'cursor-field': "published_at",
+                'max-pages': 10,
                 'lang': 'en'
                 
         }]
 
+api_from_file = False
+
 article_text = {
         "yahoo.com": {
             "css" : {
@@ -32,18 +37,82 @@ article_text = {
             }   
     }
 
+extractor_backend = "lxml"
+
+fetch_max_workers = 16
+fetch_per_host_limit = 8
+fetch_timeout = 10
+fetch_retries = 3
+fetch_backoff = 0.5
+http_pool_max_idle_per_host = 8
+
+scrape_pipeline = True
+pipeline_parse_workers = 2
+pipeline_queue_size = 64
+pipeline_commit_every = 20
+
 project_path = "<-- SNIP -->"
 
+http_cache_dir = "".join([project_path,"/cache/http"])
+http_cache_ttl = 24 * 3600
+http_cache_max_bytes = 512 * 2**20
+http_cache_offline = False
+
 db_table = "news_articles"
 db_file = "".join([project_path,"/data/news.sqlite"])
 db_retrieval_query = "SELECT pk, title, article FROM news_articles "\
                         "WHERE TrueOrFalse IS NULL"
+db_retrieval_chunk_query = "SELECT pk, title, article FROM news_articles "\
+                        "WHERE TrueOrFalse IS NULL AND pk > ? "\
+                        "ORDER BY pk LIMIT ?"
+db_reclassify_query = "SELECT pk, title, article FROM news_articles"
+db_reclassify_chunk_query = "SELECT pk, title, article FROM news_articles "\
+                        "WHERE pk > ? ORDER BY pk LIMIT ?"
 db_update_query = "UPDATE news_articles "\
-                    "SET TrueOrFalse='{}' WHERE pk={}"
+                    "SET TrueOrFalse=?, TrueProbability=? WHERE pk=?"
+db_journal_mode = "WAL"
+db_synchronous = "NORMAL"
 
 log_name = "Scraping Logger"
 log_file = "".join([project_path,"/logs/scraping.log"])
+log_level = "INFO"
+
+metrics_dir = "".join([project_path,"/metrics"])
+metrics_format = "json"
+profiler = None
+profile_dir = "".join([project_path,"/profiles"])
 
 model_pickle_file = "".join([project_path,"/logistic_reg_model.pkl"])
 vectorizer_file = "".join([project_path,"/tfidf_vectorizer.pkl"])
 encoder_file = "".join([project_path,"/label_encoder.pkl"])
+model_bundle_dir = "".join([project_path,"/model_bundle"])
+vectorizer_pruned_index = True
+
+stop_words_file = "".join([project_path,"/nlp/stop_words_english.txt"])
+
+spacy_model = "en_core_web_sm"
+spacy_exclude = ["parser", "ner"]
+lemmatize_batch_size = 256
+lemmatize_n_process = 1
+
+prediction_threshold = 0.5
+prediction_cache_file = "".join([project_path,"/cache/predictions.sqlite"])
+prediction_cache_max_entries = 100000
+
+classifier_workers = 1
+classifier_chunk_size = 500
+classifier_streaming = False
+
+daemon_batch_size = 64
+daemon_max_wait = 2.0
+daemon_poll_interval = 5.0
+daemon_max_retries = 3
+daemon_metrics_interval = 60.0
+
+server_host = "127.0.0.1"
+server_port = 8808
+server_max_batch = 64
+server_max_delay = 0.01
+server_queue_size = 1024
+server_timeout = 5.0
+server_max_body = 2**20